@@ -1,6 +1,6 @@
 # app/auth/models.py
 import logging
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, BigInteger, Text, ForeignKey, Date, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, BigInteger, Text, ForeignKey, Date, JSON, Index
 from sqlalchemy.sql import func
 from app.database.base import Base
 from sqlalchemy.orm import relationship
@@ -71,7 +71,7 @@ class UserSession(Base):
     device_id = Column(String(100), nullable=True)
     device_type = Column(String(50), nullable=True)
     refresh_token = Column(Text, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     last_login = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
@@ -80,5 +80,10 @@ class UserSession(Base):
         onupdate=func.now()
     )
     
+    # Hash index: refresh tokens are only ever matched by equality
+    __table_args__ = (
+        Index('ix_user_sessions_refresh_token', 'refresh_token', postgresql_using='hash'),
+    )
+    
     def __repr__(self):
         return f"<UserSession(session_id={self.session_id}, user_id={self.user_id})>"
\ No newline at end of file
@@ -1,9 +1,9 @@
 # app/auth/repositories.py
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, and_, select, func
 
 from .models import ExistingUser, UserSession
 
@@ -99,13 +99,26 @@ class SessionRepository:
     def __init__(self, db: Session):
         self.db = db
     
+    def next_session_id(self) -> int:
+        """
+        Reserve the next session_id from the table's sequence.
+        
+        Lets the refresh token carry its session id before the row exists,
+        so create_session inserts the finished token in one statement.
+        """
+        return self.db.execute(
+            select(func.nextval(func.pg_get_serial_sequence(UserSession.__tablename__, 'session_id')))
+        ).scalar_one()
+    
     def create_session(self, user_id: int, refresh_token: str, expires_at: datetime,
-                      device_id: Optional[str] = None, device_type: Optional[str] = None) -> UserSession:
-        """Create a new user session."""
+                      device_id: Optional[str] = None, device_type: Optional[str] = None,
+                      session_id: Optional[int] = None) -> UserSession:
+        """Create a new user session (under a session_id from next_session_id, if given)."""
         logger.info(f"Creating new session for user_id: {user_id}")
         
         try:
             session = UserSession(
+                session_id=session_id,
                 user_id=user_id,
                 device_id=device_id,
                 device_type=device_type,
@@ -116,7 +129,6 @@ class SessionRepository:
             
             self.db.add(session)
             self.db.commit()
-            self.db.refresh(session)
             
             logger.info(f"Session created successfully: {session.session_id}")
             return session
@@ -162,7 +174,34 @@ class SessionRepository:
         except Exception as e:
             logger.error(f"Error fetching sessions for user {user_id}: {str(e)}")
             raise
-    
+
+    def get_user_with_sessions(self, user_id: int) -> Tuple[Optional[ExistingUser], List[UserSession]]:
+        """Get a user and all of their active sessions in a single query."""
+        logger.debug(f"Fetching user and sessions for user_id: {user_id}")
+        try:
+            current_time = datetime.utcnow()
+            rows = self.db.query(ExistingUser, UserSession).outerjoin(
+                UserSession,
+                and_(
+                    UserSession.user_id == ExistingUser.user_id,
+                    UserSession.expires_at > current_time
+                )
+            ).filter(
+                ExistingUser.user_id == user_id
+            ).order_by(desc(UserSession.created_at)).all()
+
+            if not rows:
+                return None, []
+
+            user = rows[0][0]
+            sessions = [session for _, session in rows if session is not None]
+
+            logger.debug(f"Found {len(sessions)} active sessions for user {user_id}")
+            return user, sessions
+        except Exception as e:
+            logger.error(f"Error fetching user and sessions for user {user_id}: {str(e)}")
+            raise
+
     def update_session_refresh_token(self, session_id: int, new_refresh_token: str, 
                                    new_expires_at: datetime) -> Optional[UserSession]:
         """Update refresh token for an existing session (token rotation)."""
@@ -212,19 +251,29 @@ class SessionRepository:
             logger.error(f"Error deleting session {session_id}: {str(e)}")
             raise
     
-    def delete_session_by_refresh_token(self, refresh_token: str) -> bool:
-        """Delete session by refresh token."""
+    def delete_session_by_refresh_token(self, refresh_token: str,
+                                        session_id: Optional[int] = None) -> bool:
+        """
+        Delete session by refresh token.
+        
+        When the token's session_id is known the delete goes through the
+        primary key; the token is still matched so a rotated-out token
+        cannot remove the live session.
+        """
         logger.debug("Deleting session by refresh token")
         
         try:
-            session = self.db.query(UserSession).filter(
+            query = self.db.query(UserSession)
+            if session_id is not None:
+                query = query.filter(UserSession.session_id == session_id)
+            
+            result = query.filter(
                 UserSession.refresh_token == refresh_token
-            ).first()
+            ).delete(synchronize_session=False)
             
-            if session:
-                self.db.delete(session)
-                self.db.commit()
-                logger.debug(f"Session deleted by refresh token: {session.session_id}")
+            self.db.commit()
+            if result:
+                logger.debug(f"Session deleted by refresh token (session_id: {session_id})")
                 return True
             else:
                 logger.debug("No session found with provided refresh token")
@@ -267,4 +316,25 @@ class SessionRepository:
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error cleaning up expired sessions: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def purge_expired_sessions(self, expired_before: datetime, batch_size: int) -> int:
+        """Delete one batch of sessions that expired before the given time."""
+        logger.debug(f"Purging up to {batch_size} sessions expired before {expired_before}")
+        
+        try:
+            batch = select(UserSession.session_id).where(
+                UserSession.expires_at < expired_before
+            ).limit(batch_size).scalar_subquery()
+            
+            result = self.db.query(UserSession).filter(
+                UserSession.session_id.in_(batch)
+            ).delete(synchronize_session=False)
+            
+            self.db.commit()
+            logger.debug(f"Purged {result} expired sessions")
+            return result
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error purging expired sessions: {str(e)}")
+            raise
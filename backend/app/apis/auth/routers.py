@@ -106,7 +106,7 @@ async def logout(
     - Clears: Refresh token from database and cookie
     - Returns: Success message
     """
-    logger.info("Logout endpoint called")
+    logger.debug("Logout endpoint called")
     result = auth_service.logout(request, response)
     return LogoutResponse(message=result["message"])
 
@@ -139,7 +139,7 @@ async def get_current_user(
     - Requires: Bearer token in Authorization header
     - Returns: User profile information
     """
-    logger.info("Get current user endpoint called")
+    logger.debug("Get current user endpoint called")
     return auth_service.get_current_user(request)
 
 
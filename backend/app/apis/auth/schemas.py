@@ -43,6 +43,25 @@ class UserResponse(BaseModel):
     
     class Config:
         from_attributes = True
+    
+    @classmethod
+    def from_user(cls, user) -> "UserResponse":
+        """Build from a trusted ExistingUser row without re-validating."""
+        return cls.model_construct(
+            user_id=user.user_id,
+            email=user.email,
+            full_name=user.full_name,
+            global_employee_id=user.global_employee_id,
+            phone_number=user.phone_number,
+            location_id=user.location_id,
+            team_id=user.team_id,
+            vertical_id=user.vertical_id,
+            designation_id=user.designation_id,
+            status=user.status,
+            role_id=user.role_id,
+            is_admin=bool(user.is_admin),
+            last_login=user.last_login
+        )
 
 
 class SessionInfo(BaseModel):
@@ -13,6 +13,25 @@ from .schemas import LoginResponse, UserResponse, TokenResponse
 
 logger = logging.getLogger(__name__)
 
+# Refresh token settings resolved once at import
+_REFRESH_DELTA = timedelta(days=settings.REFRESH_EXPIRE_DAYS)
+_REFRESH_MAX_AGE = int(_REFRESH_DELTA.total_seconds())
+_SAMESITE = settings.SAME_SITE_COOKIE
+_SECURE = settings.SECURE_COOKIES
+_REFRESH_COOKIE_PATH = "/api/auth/refresh"
+
+# Set-Cookie attributes shared by every refresh cookie we emit
+_COOKIE_ATTRS = (
+    f"; HttpOnly; Path={_REFRESH_COOKIE_PATH}; SameSite={_SAMESITE}"
+    + ("; Secure" if _SECURE else "")
+)
+_SET_COOKIE_PREFIX = f"{REFRESH_TOKEN_COOKIE_NAME}="
+_SET_COOKIE_SUFFIX = f"; Max-Age={_REFRESH_MAX_AGE}{_COOKIE_ATTRS}"
+_CLEAR_COOKIE_HEADER = (
+    f"{REFRESH_TOKEN_COOKIE_NAME}=\"\"; expires=Thu, 01 Jan 1970 00:00:00 GMT; "
+    f"Max-Age=0{_COOKIE_ATTRS}"
+).encode("latin-1")
+
 
 class AuthService:
     """Service for authentication business logic."""
@@ -68,46 +87,36 @@ class AuthService:
                 subject=email,  # Fixed: changed 'email' to 'subject'
                 user_id=user.user_id
             )
+            
+            # Calculate refresh token expiration
+            refresh_expires_at = datetime.utcnow() + _REFRESH_DELTA
+            
+            # The refresh token carries its session id, reserved before the insert
+            session_id = self.session_repo.next_session_id()
             refresh_token = security_service.create_refresh_token(
                 subject=email,  # Fixed: changed 'email' to 'subject'
-                user_id=user.user_id
+                user_id=user.user_id,
+                session_id=session_id
             )
             
-            # Calculate refresh token expiration
-            refresh_expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_EXPIRE_DAYS)
-            
             # Create session in database
             session = self.session_repo.create_session(
                 user_id=user.user_id,
                 refresh_token=refresh_token,
                 expires_at=refresh_expires_at,
                 device_id=device_id,
-                device_type=device_type
+                device_type=device_type,
+                session_id=session_id
             )
             
             # Set refresh token cookie
             self._set_refresh_token_cookie(response, refresh_token)
             
             # Prepare user response
-            user_response = UserResponse(
-                user_id=user.user_id,
-                email=user.email,
-                full_name=user.full_name,
-                global_employee_id=user.global_employee_id,
-                phone_number=user.phone_number,
-                location_id=user.location_id,
-                team_id=user.team_id,
-                vertical_id=user.vertical_id,
-                designation_id=user.designation_id,
-                status=user.status,
-                role_id=user.role_id,
-                # Remove is_admin if it doesn't exist in your database
-                # is_admin=user.is_admin if hasattr(user, 'is_admin') else False,
-                last_login=user.last_login
-            )
+            user_response = UserResponse.from_user(user)
             
             # Prepare token response
-            token_response = TokenResponse(
+            token_response = TokenResponse.model_construct(
                 access_token=access_token,
                 expires_in=expires_in
             )
@@ -190,9 +199,10 @@ class AuthService:
             # Refresh token rotation: create new refresh token
             new_refresh_token = security_service.create_refresh_token(
                 subject=email,  # Fixed: changed 'email' to 'subject'
-                user_id=user.user_id
+                user_id=user.user_id,
+                session_id=session.session_id
             )
-            new_refresh_expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_EXPIRE_DAYS)
+            new_refresh_expires_at = datetime.utcnow() + _REFRESH_DELTA
             
             # Update session with new token
             self.session_repo.update_session_refresh_token(
@@ -211,7 +221,7 @@ class AuthService:
             )
             
             logger.info(f"Token refreshed successfully for user: {email}")
-            return TokenResponse(
+            return TokenResponse.model_construct(
                 access_token=access_token,
                 expires_in=expires_in
             )
@@ -271,22 +281,7 @@ class AuthService:
             
             logger.debug(f"Current user retrieved: {email}")
             
-            return UserResponse(
-                user_id=user.user_id,
-                email=user.email,
-                full_name=user.full_name,
-                global_employee_id=user.global_employee_id,
-                phone_number=user.phone_number,
-                location_id=user.location_id,
-                team_id=user.team_id,
-                vertical_id=user.vertical_id,
-                designation_id=user.designation_id,
-                status=user.status,
-                role_id=user.role_id,
-                # Remove is_admin if it doesn't exist in your database
-                # is_admin=user.is_admin if hasattr(user, 'is_admin') else False,
-                last_login=user.last_login
-            )
+            return UserResponse.from_user(user)
             
         except HTTPException:
             raise
@@ -299,22 +294,20 @@ class AuthService:
     
     def logout(self, request: Request, response: Response) -> Dict[str, str]:
         """Handle user logout."""
-        logger.info("Processing logout")
+        logger.debug("Processing logout")
         
         try:
             # Get refresh token from cookie
             refresh_token = request.cookies.get(REFRESH_TOKEN_COOKIE_NAME)
-            logger.info(refresh_token)
             
             if refresh_token:
-                # Delete session by refresh token
-                self.session_repo.delete_session_by_refresh_token(refresh_token)
-                logger.info("Session deleted for logout")
-            
-            # Clear refresh token cookie
-            self._clear_refresh_token_cookie(response)
+                # Delete session by refresh token and clear the cookie
+                session_id = security_service.extract_session_id_from_token(refresh_token)
+                self.session_repo.delete_session_by_refresh_token(refresh_token, session_id=session_id)
+                self._clear_refresh_token_cookie(response)
+                logger.debug("Session deleted for logout")
             
-            logger.info("Logout completed")
+            logger.debug("Logout completed")
             return {"message": "Logged out successfully"}
             
         except Exception as e:
@@ -374,16 +367,14 @@ class AuthService:
             email = payload.get("sub")
             user_id = payload.get("user_id")
             
-            user = self.user_repo.get_by_user_id(user_id)
+            # Get user and all active sessions in one round-trip
+            user, sessions = self.session_repo.get_user_with_sessions(user_id)
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found"
                 )
             
-            # Get all active sessions
-            sessions = self.session_repo.get_user_sessions(user.user_id)
-            
             return {
                 "user_id": user.user_id,
                 "email": user.email,
@@ -411,24 +402,12 @@ class AuthService:
     
     def _set_refresh_token_cookie(self, response: Response, token: str):
         """Set refresh token as HTTP-only cookie."""
-        response.set_cookie(
-            key=REFRESH_TOKEN_COOKIE_NAME,
-            value=token,
-            httponly=True,
-            max_age=60 * 60 * 24 * settings.REFRESH_EXPIRE_DAYS,
-            samesite=settings.SAME_SITE_COOKIE,
-            secure=settings.SECURE_COOKIES,
-            path="/api/auth/refresh"
+        response.raw_headers.append(
+            (b"set-cookie", (_SET_COOKIE_PREFIX + token + _SET_COOKIE_SUFFIX).encode("latin-1"))
         )
         logger.debug("Refresh token cookie set")
     
     def _clear_refresh_token_cookie(self, response: Response):
         """Clear refresh token cookie."""
-        response.delete_cookie(
-            key=REFRESH_TOKEN_COOKIE_NAME,
-            path="/api/auth/refresh",
-            httponly=True,
-            samesite=settings.SAME_SITE_COOKIE,
-            secure=settings.SECURE_COOKIES
-        )
+        response.raw_headers.append((b"set-cookie", _CLEAR_COOKIE_HEADER))
         logger.debug("Refresh token cookie cleared")
\ No newline at end of file
@@ -81,11 +81,15 @@
 
 # app/apis/attendance/models.py
 import logging
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, BigInteger, Date, JSON, ForeignKey, Numeric, Enum as SQLEnum, UniqueConstraint
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, BigInteger, Date, ForeignKey, Numeric, Enum as SQLEnum, Index
+from sqlalchemy import DDL, event, select, cast, extract, and_, or_
+from sqlalchemy.sql import func, text, table, column
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
 from app.database.base import Base
 import enum
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -111,6 +115,19 @@ class LeaveStatusEnum(str, enum.Enum):
     REJECTED = "rejected"
 
 
+@lru_cache(maxsize=None)
+def _enum_values(enum_cls) -> tuple:
+    """Database values of an Enum class, computed once per class."""
+    return tuple(e.value for e in enum_cls)
+
+
+# Shared column types: one native enum type per Python enum, reused by every
+# column of that enum so string <-> member lookups go through a single map
+DayTypeType = SQLEnum(DayTypeEnum, values_callable=_enum_values, native_enum=True)
+HalfStatusType = SQLEnum(HalfStatusEnum, values_callable=_enum_values, native_enum=True)
+LeaveStatusType = SQLEnum(LeaveStatusEnum, values_callable=_enum_values, native_enum=True)
+
+
 class EmployeeAvailability(Base):
     """Employee attendance/availability model."""
     
@@ -119,9 +136,9 @@ class EmployeeAvailability(Base):
     attendance_id = Column(BigInteger, primary_key=True)
     employee_id = Column(BigInteger, ForeignKey('users.user_id'), nullable=False)
     attendance_date = Column(Date, nullable=False)
-    day_type = Column(SQLEnum(DayTypeEnum, values_callable=lambda enum: [e.value for e in enum],native_enum=True ), nullable=False, default=DayTypeEnum.WORKDAY.value)
-    first_half = Column(SQLEnum(HalfStatusEnum, values_callable=lambda enum: [e.value for e in enum],native_enum=True ), nullable=False, default=HalfStatusEnum.NA.value)
-    second_half = Column(SQLEnum(HalfStatusEnum, values_callable=lambda enum: [e.value for e in enum],native_enum=True ), nullable=False, default=HalfStatusEnum.NA.value)
+    day_type = Column(DayTypeType, nullable=False, default=DayTypeEnum.WORKDAY.value)
+    first_half = Column(HalfStatusType, nullable=False, default=HalfStatusEnum.NA.value)
+    second_half = Column(HalfStatusType, nullable=False, default=HalfStatusEnum.NA.value)
    
     check_in_time = Column(DateTime(timezone=True), nullable=True)
     check_in_location_id = Column(BigInteger, ForeignKey('offices.office_id'), nullable=True)
@@ -131,32 +148,134 @@ class EmployeeAvailability(Base):
     shift_id = Column(BigInteger, ForeignKey('shifts.shift_id'), nullable=False)
     leave_applied_by_id = Column(BigInteger, ForeignKey('users.user_id'), nullable=True)
     leave_applied_at = Column(DateTime(timezone=True), nullable=True)
-    leave_status = Column(SQLEnum(LeaveStatusEnum, values_callable=lambda enum: [e.value for e in enum],native_enum=True ), nullable=True)
+    leave_status = Column(LeaveStatusType, nullable=True)
     leave_approved_by_id = Column(BigInteger, ForeignKey('users.user_id'), nullable=True)
     leave_approved_at = Column(DateTime(timezone=True), nullable=True)
-    comment_json = Column(JSON, nullable=True, default=dict)
+    comment_json = Column(JSONB, nullable=True, server_default=text("'{}'::jsonb"))
     updated_by_id = Column(BigInteger, ForeignKey('users.user_id'), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    # Add unique constraint
+    # Unique (employee_id, attendance_date) index; also serves per-employee
+    # date-range scans in either direction. INCLUDE makes it covering for the
+    # status/hours columns read by the monthly summary.
     __table_args__ = (
-        UniqueConstraint('employee_id', 'attendance_date', name='uq_employee_date'),
+        Index(
+            'uq_employee_date',
+            'employee_id', 'attendance_date',
+            unique=True,
+            postgresql_include=['day_type', 'first_half', 'second_half', 'total_workhours'],
+        ),
     )
     
     # Relationships
-    employee = relationship("ExistingUser", foreign_keys=[employee_id])
-    check_in_location = relationship("Office", foreign_keys=[check_in_location_id])
-    check_out_location = relationship("Office", foreign_keys=[check_out_location_id])
-    shift = relationship("Shift")
-    leave_applied_by = relationship("ExistingUser", foreign_keys=[leave_applied_by_id])
-    leave_approved_by = relationship("ExistingUser", foreign_keys=[leave_approved_by_id])
-    updated_by = relationship("ExistingUser", foreign_keys=[updated_by_id])
+    # lazy="raise": callers must opt in with selectinload/joinedload so list
+    # endpoints never fall into per-row lazy loads (N+1)
+    employee = relationship("ExistingUser", foreign_keys=[employee_id], lazy="raise")
+    check_in_location = relationship("Office", foreign_keys=[check_in_location_id], lazy="raise")
+    check_out_location = relationship("Office", foreign_keys=[check_out_location_id], lazy="raise")
+    shift = relationship("Shift", lazy="raise")
+    leave_applied_by = relationship("ExistingUser", foreign_keys=[leave_applied_by_id], lazy="raise")
+    leave_approved_by = relationship("ExistingUser", foreign_keys=[leave_approved_by_id], lazy="raise")
+    updated_by = relationship("ExistingUser", foreign_keys=[updated_by_id], lazy="raise")
     
     def __repr__(self):
         return f"<EmployeeAvailability(attendance_id={self.attendance_id}, employee_id={self.employee_id}, date={self.attendance_date})>"
 
 
+def monthly_summary_columns() -> list:
+    """
+    Aggregate columns of the monthly attendance summary.
+    
+    Day categories are exclusive, in the report's precedence: weekoff,
+    holiday/comp-off, present, leave, otherwise absent. Shared by the live
+    query and the rollup view so both count the same way. Built on table
+    columns so it is usable at import time, before mappers are configured.
+    """
+    attendance = EmployeeAvailability.__table__
+    is_weekoff = attendance.c.day_type == DayTypeEnum.WEEKOFF
+    is_holiday = attendance.c.day_type.in_([DayTypeEnum.HOLIDAY, DayTypeEnum.COMP_OFF])
+    is_working = ~or_(is_weekoff, is_holiday)
+    is_present = and_(
+        is_working,
+        attendance.c.first_half == HalfStatusEnum.PRESENT,
+        attendance.c.second_half == HalfStatusEnum.PRESENT
+    )
+    is_leave = and_(
+        is_working,
+        or_(
+            attendance.c.first_half == HalfStatusEnum.LEAVE,
+            attendance.c.second_half == HalfStatusEnum.LEAVE
+        )
+    )
+    is_full_day_leave = and_(
+        is_working,
+        attendance.c.first_half == HalfStatusEnum.LEAVE,
+        attendance.c.second_half == HalfStatusEnum.LEAVE
+    )
+    return [
+        func.count().label('total_days'),
+        func.count().filter(is_weekoff).label('weekoff_days'),
+        func.count().filter(is_holiday).label('holiday_days'),
+        func.count().filter(is_present).label('present_days'),
+        func.count().filter(is_leave).label('leave_days'),
+        func.count().filter(and_(is_leave, ~is_full_day_leave)).label('half_day_leaves'),
+        func.count().filter(is_full_day_leave).label('full_day_leaves'),
+        func.coalesce(func.sum(attendance.c.total_workhours), 0).label('total_work_hours'),
+    ]
+
+
+class MonthlySummaryDirty(Base):
+    """
+    An employee's month written since the monthly summary view was last
+    refreshed; get_monthly_summary aggregates it live until the refresh.
+    """
+    __tablename__ = "monthly_attendance_summary_dirty"
+    
+    employee_id = Column(Integer, primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+
+
+# Monthly rollup of attendance per employee, read by get_monthly_summary for
+# closed months. Created with the tables (no-op if present) and refreshed
+# from main.py, periodically and soon after a write marks a month dirty
+# (MonthlySummaryDirty); the unique index allows REFRESH ... CONCURRENTLY.
+MONTHLY_SUMMARY_VIEW = "mv_monthly_attendance_summary"
+
+_attendance = EmployeeAvailability.__table__
+_summary_year = cast(extract('year', _attendance.c.attendance_date), Integer)
+_summary_month = cast(extract('month', _attendance.c.attendance_date), Integer)
+
+_monthly_summary_select = select(
+    _attendance.c.employee_id,
+    _summary_year.label('year'),
+    _summary_month.label('month'),
+    *monthly_summary_columns()
+).group_by(
+    _attendance.c.employee_id, _summary_year, _summary_month
+)
+
+monthly_summary_view = table(
+    MONTHLY_SUMMARY_VIEW,
+    column('employee_id'), column('year'), column('month'),
+    column('total_days'), column('weekoff_days'), column('holiday_days'),
+    column('present_days'), column('leave_days'),
+    column('half_day_leaves'), column('full_day_leaves'), column('total_work_hours'),
+)
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS {MONTHLY_SUMMARY_VIEW} AS "
+        f"{_monthly_summary_select.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})}; "
+        f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{MONTHLY_SUMMARY_VIEW} "
+        f"ON {MONTHLY_SUMMARY_VIEW} (employee_id, year, month)"
+    ).execute_if(dialect="postgresql")
+)
+
+
 
 
 
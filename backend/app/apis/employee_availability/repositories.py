@@ -1,44 +1,158 @@
 # app/apis/attendance/repositories.py
 import logging
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Iterable
 from datetime import datetime, date, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc, asc, func, extract, case, cast, String
-from sqlalchemy.sql import text
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import or_, and_, desc, asc, func, extract, case, cast, String, Numeric, DateTime, update, delete, literal, inspect, tuple_, select
+from sqlalchemy.sql import text, literal_column
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB
 
-from .models import EmployeeAvailability, DayTypeEnum, HalfStatusEnum, LeaveStatusEnum
+from .models import (
+    EmployeeAvailability, DayTypeEnum, HalfStatusEnum, LeaveStatusEnum,
+    MonthlySummaryDirty, MONTHLY_SUMMARY_VIEW, monthly_summary_columns, monthly_summary_view
+)
 from .schemas import AttendanceFilter
+from app.apis.auth.models import ExistingUser
 
 logger = logging.getLogger(__name__)
 
+# Columns search() may order by; each has an index-backed ORDER BY for the
+# employee-scoped listing (uq_employee_date or the primary key)
+_SORTABLE_COLUMNS = {
+    'attendance_date': EmployeeAvailability.attendance_date,
+    'employee_id': EmployeeAvailability.employee_id,
+    'attendance_id': EmployeeAvailability.attendance_id,
+}
+
+# Relationships whose names EmployeeAvailabilityResponse exposes; the read
+# paths load all of them up front (the relationships are lazy="raise")
+_NAMED_RELATIONSHIPS = (
+    'employee', 'shift', 'check_in_location', 'check_out_location',
+    'leave_applied_by', 'leave_approved_by', 'updated_by',
+)
+
+
+def _workhours(check_in_time, check_out_time):
+    """SQL expression for the hours worked between check-in and check-out."""
+    return cast(extract('epoch', check_out_time - check_in_time) / 3600, Numeric(5, 2))
+
+
+def _with_workhours(values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add a total_workhours SET expression when an update moves check-in or
+    check-out time without supplying the hours, so the DB keeps them in step.
+    """
+    if 'total_workhours' in values or not {'check_in_time', 'check_out_time'} & values.keys():
+        return values
+    check_in_time = (
+        literal(values['check_in_time'], DateTime(timezone=True))
+        if 'check_in_time' in values else EmployeeAvailability.check_in_time
+    )
+    check_out_time = (
+        literal(values['check_out_time'], DateTime(timezone=True))
+        if 'check_out_time' in values else EmployeeAvailability.check_out_time
+    )
+    values['total_workhours'] = case(
+        (and_(check_in_time.isnot(None), check_out_time.isnot(None)),
+         _workhours(check_in_time, check_out_time)),
+        else_=EmployeeAvailability.total_workhours
+    )
+    return values
+
+
+def _rollup_cutoff() -> date:
+    """First day of last month; earlier months are served from the monthly summary view."""
+    return (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+def _merge_comment_json(new_comments):
+    """SQL expression merging new comments into the stored comment_json (jsonb ||)."""
+    return func.coalesce(
+        EmployeeAvailability.comment_json, literal_column("'{}'::jsonb")
+    ).op('||')(new_comments)
+
 
 class AttendanceRepository:
-    """Repository for EmployeeAvailability database operations."""
+    """
+    Repository for EmployeeAvailability database operations.
+    
+    Write methods flush but never commit: the service commits once per
+    operation, so a request is a single transaction. Writes to months the
+    monthly summary view serves mark those months dirty in the same
+    transaction (_mark_written).
+    """
     
     def __init__(self, db: Session):
         self.db = db
     
+    def _mark_written(self, written: Iterable[Tuple[int, date]]):
+        """
+        Mark the (employee_id, attendance_date) pairs' months dirty where the
+        monthly summary view serves them, so they are aggregated live until
+        the next refresh.
+        """
+        cutoff = _rollup_cutoff()
+        months = {
+            (employee_id, attendance_date.year, attendance_date.month)
+            for employee_id, attendance_date in written
+            if attendance_date < cutoff
+        }
+        if months:
+            self.db.execute(
+                pg_insert(MonthlySummaryDirty).values([
+                    {'employee_id': employee_id, 'year': year, 'month': month}
+                    for employee_id, year, month in sorted(months)
+                ]).on_conflict_do_nothing()
+            )
+    
+    def _execute_returning(self, stmt):
+        """
+        Run an UPDATE ... RETURNING EmployeeAvailability and load the rows.
+        
+        Going through from_statement lets populate_existing refresh
+        instances already in the session from the returned rows, with no
+        follow-up SELECT.
+        """
+        return self.db.scalars(
+            select(EmployeeAvailability).from_statement(stmt).execution_options(populate_existing=True)
+        )
+    
     def get_by_id(self, attendance_id: int) -> Optional[EmployeeAvailability]:
         """Get attendance record by ID."""
         logger.debug(f"Fetching attendance by ID: {attendance_id}")
         try:
-            record = self.db.query(EmployeeAvailability).filter(
-                EmployeeAvailability.attendance_id == attendance_id
-            ).first()
+            # Identity-map hit returns without SQL; loader options only apply
+            # on a cold read, so an instance fresh from a write (UPSERT /
+            # UPDATE ... RETURNING) gets its missing relationships in one
+            # joined SELECT rather than a refresh per relationship
+            options = [joinedload(getattr(EmployeeAvailability, name)) for name in _NAMED_RELATIONSHIPS]
+            record = self.db.get(EmployeeAvailability, attendance_id, options=options)
+            if record is not None:
+                state = inspect(record)
+                if any(name in state.unloaded for name in _NAMED_RELATIONSHIPS):
+                    self.db.execute(
+                        select(EmployeeAvailability).options(*options).where(
+                            EmployeeAvailability.attendance_id == attendance_id
+                        )
+                    ).unique().all()
             return record
         except Exception as e:
             logger.error(f"Error fetching attendance by ID {attendance_id}: {str(e)}")
             raise
     
-    def get_by_employee_date(self, employee_id: int, attendance_date: date) -> Optional[EmployeeAvailability]:
-        """Get attendance record by employee ID and date."""
+    def get_record_by_employee_date(self, employee_id: int, attendance_date: date) -> Optional[EmployeeAvailability]:
+        """Get the attendance record for an employee and date (one uq_employee_date lookup)."""
         logger.debug(f"Fetching attendance for employee {employee_id} on {attendance_date}")
         try:
-            record = self.db.query(EmployeeAvailability).filter(
-                EmployeeAvailability.employee_id == employee_id,
-                EmployeeAvailability.attendance_date == attendance_date
-            ).first()
-            return record
+            return self.db.execute(
+                select(EmployeeAvailability).options(
+                    *[joinedload(getattr(EmployeeAvailability, name)) for name in _NAMED_RELATIONSHIPS]
+                ).where(
+                    EmployeeAvailability.employee_id == employee_id,
+                    EmployeeAvailability.attendance_date == attendance_date
+                )
+            ).unique().scalar_one_or_none()
         except Exception as e:
             logger.error(f"Error fetching attendance for employee {employee_id} on {attendance_date}: {str(e)}")
             raise
@@ -48,53 +162,141 @@ class AttendanceRepository:
         logger.info(f"Creating attendance for employee {attendance_data.get('employee_id')} on {attendance_data.get('attendance_date')}")
         
         try:
-            # Check if record already exists
-            existing = self.get_by_employee_date(
-                attendance_data['employee_id'],
-                attendance_data['attendance_date']
-            )
-            if existing:
-                raise ValueError(f"Attendance already exists for employee {attendance_data['employee_id']} on {attendance_data['attendance_date']}")
-            
-            # Create record
-            record = EmployeeAvailability(
-                **attendance_data,
-                updated_by_id=updated_by_id
-            )
+            # Uniqueness of (employee_id, attendance_date) is enforced by the
+            # uq_employee_date index; no pre-read
+            record = EmployeeAvailability(**{**attendance_data, 'updated_by_id': updated_by_id})
             
             self.db.add(record)
-            self.db.commit()
-            self.db.refresh(record)
+            self.db.flush()
+            self._mark_written([(record.employee_id, record.attendance_date)])
             
             logger.info(f"Attendance created successfully: {record.attendance_id}")
             return record
             
-        except ValueError as e:
+        except IntegrityError as e:
             self.db.rollback()
+            if getattr(getattr(e.orig, 'diag', None), 'constraint_name', None) == 'uq_employee_date':
+                raise ValueError(f"Attendance already exists for employee {attendance_data['employee_id']} on {attendance_data['attendance_date']}") from e
+            logger.error(f"Error creating attendance: {str(e)}")
             raise
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error creating attendance: {str(e)}")
             raise
     
+    def upsert_many(self, records: List[Dict[str, Any]], updated_by_id: int) -> List[int]:
+        """
+        Create or overwrite many attendance records (e.g. month-end imports).
+        
+        One multi-row INSERT ... ON CONFLICT DO UPDATE on (employee_id,
+        attendance_date), batched by the engine's insertmanyvalues_page_size.
+        Existing rows take the imported values and merge comment_json.
+        Returns the attendance IDs in input order.
+        """
+        logger.info(f"Bulk upserting {len(records)} attendance records")
+        
+        if not records:
+            return []
+        
+        try:
+            payload = [{**record, 'updated_by_id': updated_by_id} for record in records]
+            
+            # Core insert against the table: the ORM bulk path would regroup
+            # rows by their non-NULL keys
+            stmt = pg_insert(EmployeeAvailability.__table__)
+            set_ = {
+                key: stmt.excluded[key] for key in payload[0]
+                if key not in ('employee_id', 'attendance_date', 'comment_json')
+            }
+            set_['comment_json'] = _merge_comment_json(stmt.excluded.comment_json)
+            set_['updated_at'] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['employee_id', 'attendance_date'],
+                set_=set_
+            ).returning(
+                stmt.table.c.attendance_id, stmt.table.c.employee_id, stmt.table.c.attendance_date
+            )
+            
+            # Rows come back in batch order; map them back by natural key
+            rows = self.db.execute(stmt, payload).all()
+            ids_by_key = {(row.employee_id, row.attendance_date): row.attendance_id for row in rows}
+            attendance_ids = [ids_by_key[(r['employee_id'], r['attendance_date'])] for r in records]
+            self._mark_written(ids_by_key)
+            
+            logger.info(f"Bulk upserted {len(attendance_ids)} attendance records")
+            return attendance_ids
+            
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error bulk upserting attendance: {str(e)}")
+            raise
+    
+    def update_many(self, attendance_ids: List[int], update_data: Dict[str, Any], updated_by_id: int) -> List[int]:
+        """
+        Apply the same update to many attendance records in one UPDATE.
+        
+        Returns the IDs that were updated; unknown IDs are left out.
+        """
+        logger.info(f"Bulk updating {len(attendance_ids)} attendance records")
+        
+        if not attendance_ids:
+            return []
+        
+        try:
+            columns = EmployeeAvailability.__table__.c
+            values = {
+                key: value for key, value in update_data.items()
+                if value is not None and key in columns
+            }
+            values['updated_by_id'] = updated_by_id
+            _with_workhours(values)
+            
+            stmt = update(EmployeeAvailability).where(
+                EmployeeAvailability.attendance_id.in_(attendance_ids)
+            ).values(**values).returning(
+                EmployeeAvailability.attendance_id, EmployeeAvailability.employee_id,
+                EmployeeAvailability.attendance_date
+            )
+            
+            updated = self.db.execute(
+                stmt, execution_options={"synchronize_session": "fetch"}
+            ).all()
+            self._mark_written((row.employee_id, row.attendance_date) for row in updated)
+            
+            logger.info(f"Bulk updated {len(updated)} attendance records")
+            return [row.attendance_id for row in updated]
+            
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error bulk updating attendance: {str(e)}")
+            raise
+    
     def update(self, attendance: EmployeeAvailability, update_data: Dict[str, Any], updated_by_id: int) -> EmployeeAvailability:
         """Update an existing attendance record."""
         logger.debug(f"Updating attendance: {attendance.attendance_id}")
         
         try:
-            # Update fields
-            for key, value in update_data.items():
-                if value is not None and hasattr(attendance, key):
-                    setattr(attendance, key, value)
+            # Only the supplied columns go into the SET clause
+            columns = EmployeeAvailability.__table__.c
+            values = {
+                key: value for key, value in update_data.items()
+                if value is not None and key in columns
+            }
+            values['updated_by_id'] = updated_by_id
+            _with_workhours(values)
             
-            # Update metadata
-            attendance.updated_by_id = updated_by_id
+            # One UPDATE ... RETURNING; the identity-mapped instance is
+            # refreshed from the returned row (so the old key is read first)
+            stmt = update(EmployeeAvailability).where(
+                EmployeeAvailability.attendance_id == attendance.attendance_id
+            ).values(**values).returning(EmployeeAvailability)
             
-            self.db.commit()
-            self.db.refresh(attendance)
+            previous = (attendance.employee_id, attendance.attendance_date)
+            record = self._execute_returning(stmt).one()
+            self._mark_written([previous, (record.employee_id, record.attendance_date)])
             
-            logger.debug(f"Attendance updated successfully: {attendance.attendance_id}")
-            return attendance
+            logger.debug(f"Attendance updated successfully: {record.attendance_id}")
+            return record
             
         except Exception as e:
             self.db.rollback()
@@ -106,13 +308,20 @@ class AttendanceRepository:
         logger.warning(f"Deleting attendance: {attendance_id}")
         
         try:
-            record = self.get_by_id(attendance_id)
-            if not record:
+            # Single DELETE ... RETURNING of just the row's key; no row hydration
+            deleted = self.db.execute(
+                delete(EmployeeAvailability).where(
+                    EmployeeAvailability.attendance_id == attendance_id
+                ).returning(
+                    EmployeeAvailability.employee_id, EmployeeAvailability.attendance_date
+                ),
+                execution_options={"synchronize_session": "fetch"}
+            ).one_or_none()
+            if not deleted:
                 logger.warning(f"Attendance not found for deletion: {attendance_id}")
                 return False
             
-            self.db.delete(record)
-            self.db.commit()
+            self._mark_written([(deleted.employee_id, deleted.attendance_date)])
             
             logger.warning(f"Attendance deleted successfully: {attendance_id}")
             return True
@@ -122,10 +331,34 @@ class AttendanceRepository:
             logger.error(f"Error deleting attendance {attendance_id}: {str(e)}")
             raise
     
+    @staticmethod
+    def _date_bounds(filters: AttendanceFilter) -> Tuple[Optional[date], Optional[date]]:
+        """Intersect the date-range, month and year filters as (inclusive, exclusive) bounds."""
+        lowers, uppers = [], []
+        if filters.start_date:
+            lowers.append(filters.start_date)
+        if filters.end_date:
+            uppers.append(filters.end_date + timedelta(days=1))
+        if filters.year and filters.month:
+            lowers.append(date(filters.year, filters.month, 1))
+            uppers.append(date(filters.year + filters.month // 12, filters.month % 12 + 1, 1))
+        elif filters.year:
+            lowers.append(date(filters.year, 1, 1))
+            uppers.append(date(filters.year + 1, 1, 1))
+        return max(lowers, default=None), min(uppers, default=None)
+    
     def search(self, filters: AttendanceFilter, skip: int = 0, limit: int = 100,
-               sort_by: str = "attendance_date", sort_order: str = "desc") -> Tuple[List[EmployeeAvailability], int]:
-        """Search attendance records with filters."""
-        logger.debug(f"Searching attendance with filters: {filters.dict(exclude_none=True)}")
+               sort_by: str = "attendance_date", sort_order: str = "desc",
+               after: Optional[Tuple[date, int]] = None) -> Tuple[List[EmployeeAvailability], Optional[int]]:
+        """
+        Search attendance records with filters.
+        
+        With `after` (an (attendance_date, attendance_id) cursor from the
+        previous page) the page is fetched by keyset instead of OFFSET,
+        ordered by attendance_date then attendance_id, and no total is
+        computed (returned as None).
+        """
+        logger.debug("Searching attendance with filters: %s", filters)
         
         try:
             query = self.db.query(EmployeeAvailability)
@@ -134,49 +367,69 @@ class AttendanceRepository:
             if filters.employee_id:
                 query = query.filter(EmployeeAvailability.employee_id == filters.employee_id)
             
-            if filters.start_date:
-                query = query.filter(EmployeeAvailability.attendance_date >= filters.start_date)
-            
-            if filters.end_date:
-                query = query.filter(EmployeeAvailability.attendance_date <= filters.end_date)
-            
-            if filters.month and filters.year:
-                query = query.filter(
-                    extract('month', EmployeeAvailability.attendance_date) == filters.month,
-                    extract('year', EmployeeAvailability.attendance_date) == filters.year
-                )
-            elif filters.month:
+            # Date range, month and year collapse into one half-open interval
+            # [lower, upper) so the attendance_date index can be range-scanned;
+            # a month with no year has no range form
+            lower, upper = self._date_bounds(filters)
+            if lower:
+                query = query.filter(EmployeeAvailability.attendance_date >= lower)
+            if upper:
+                query = query.filter(EmployeeAvailability.attendance_date < upper)
+            if filters.month and not filters.year:
                 query = query.filter(extract('month', EmployeeAvailability.attendance_date) == filters.month)
-            elif filters.year:
-                query = query.filter(extract('year', EmployeeAvailability.attendance_date) == filters.year)
             
             if filters.day_type:
-                query = query.filter(EmployeeAvailability.day_type == filters.day_type.value)
+                query = query.filter(EmployeeAvailability.day_type == filters.day_type)
             
             if filters.first_half:
-                query = query.filter(EmployeeAvailability.first_half == filters.first_half.value)
+                query = query.filter(EmployeeAvailability.first_half == filters.first_half)
             
             if filters.second_half:
-                query = query.filter(EmployeeAvailability.second_half == filters.second_half.value)
+                query = query.filter(EmployeeAvailability.second_half == filters.second_half)
             
             if filters.leave_status:
-                query = query.filter(EmployeeAvailability.leave_status == filters.leave_status.value)
+                query = query.filter(EmployeeAvailability.leave_status == filters.leave_status)
             
             if filters.shift_id:
                 query = query.filter(EmployeeAvailability.shift_id == filters.shift_id)
             
-            # Get total count before pagination
-            total = query.count()
-            
-            # Apply sorting
-            sort_column = getattr(EmployeeAvailability, sort_by, EmployeeAvailability.attendance_date)
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_column))
+            # Apply sorting; attendance_id breaks ties so pages are stable
+            # and a page's last row is a valid keyset cursor
+            if after is not None:
+                sort_column = EmployeeAvailability.attendance_date
             else:
-                query = query.order_by(asc(sort_column))
-            
-            # Apply pagination
-            records = query.offset(skip).limit(limit).all()
+                sort_column = _SORTABLE_COLUMNS.get(sort_by, EmployeeAvailability.attendance_date)
+            direction = desc if sort_order.lower() == "desc" else asc
+            query = query.order_by(direction(sort_column))
+            if sort_column is not EmployeeAvailability.attendance_id:
+                query = query.order_by(direction(EmployeeAvailability.attendance_id))
+            
+            # Related rows for the page come in one IN query per relationship
+            eager = [selectinload(getattr(EmployeeAvailability, name)) for name in _NAMED_RELATIONSHIPS]
+            
+            if after is not None:
+                # Keyset page: seek past the cursor, no OFFSET and no count
+                key = tuple_(EmployeeAvailability.attendance_date, EmployeeAvailability.attendance_id)
+                query = query.filter(key < after if direction is desc else key > after)
+                records = query.options(*eager).limit(limit).all()
+                total = None
+                logger.debug(f"Found {len(records)} attendance records after cursor {after}")
+                return records, total
+            
+            # Page and total in one round-trip: count(*) OVER () is evaluated
+            # before LIMIT/OFFSET
+            rows = query.add_columns(
+                func.count().over().label('total')
+            ).options(*eager).offset(skip).limit(limit).all()
+            
+            records = [row[0] for row in rows]
+            if rows:
+                total = rows[0].total
+            elif skip:
+                # Page past the end: the window has no row to report on
+                total = query.order_by(None).count()
+            else:
+                total = 0
             
             logger.debug(f"Found {len(records)} attendance records (total: {total})")
             return records, total
@@ -188,55 +441,52 @@ class AttendanceRepository:
     def apply_leave(self, employee_id: int, attendance_date: date, half_type: str,
                    leave_applied_by_id: int, reason: Optional[str] = None,
                    comment_json: Optional[Dict] = None) -> EmployeeAvailability:
-        """Apply for leave."""
+        """Apply for leave (single INSERT ... ON CONFLICT DO UPDATE)."""
         logger.info(f"Applying {half_type} leave for employee {employee_id} on {attendance_date}")
         
         try:
-            # Get or create attendance record
-            record = self.get_by_employee_date(employee_id, attendance_date)
+            first_half_leave = half_type in ("first", "full")
+            second_half_leave = half_type in ("second", "full")
+            
+            comments = dict(comment_json or {})
+            if reason:
+                comments['leave_reason'] = reason
+            
+            stmt = pg_insert(EmployeeAvailability).values(
+                employee_id=employee_id,
+                attendance_date=attendance_date,
+                day_type=DayTypeEnum.WORKDAY,
+                first_half=HalfStatusEnum.LEAVE if first_half_leave else HalfStatusEnum.NA,
+                second_half=HalfStatusEnum.LEAVE if second_half_leave else HalfStatusEnum.NA,
+                shift_id=1,  # Default shift, should be parameterized
+                updated_by_id=leave_applied_by_id,
+                leave_applied_by_id=leave_applied_by_id,
+                leave_applied_at=func.now(),
+                leave_status=LeaveStatusEnum.PENDING,
+                comment_json=comments
+            )
             
-            if not record:
-                # Create new record for leave application
-                record = EmployeeAvailability(
-                    employee_id=employee_id,
-                    attendance_date=attendance_date,
-                    day_type=DayTypeEnum.WORKDAY,
-                    shift_id=1,  # Default shift, should be parameterized
-                    updated_by_id=leave_applied_by_id,
-                    leave_applied_by_id=leave_applied_by_id,
-                    leave_applied_at=datetime.utcnow(),
-                    leave_status=LeaveStatusEnum.PENDING
-                )
-                self.db.add(record)
-            
-            # Update leave status based on half type
-            if half_type == "first":
-                record.first_half = HalfStatusEnum.LEAVE
-            elif half_type == "second":
-                record.second_half = HalfStatusEnum.LEAVE
-            elif half_type == "full":
-                record.first_half = HalfStatusEnum.LEAVE
-                record.second_half = HalfStatusEnum.LEAVE
-            
-            # Update leave application details
-            record.leave_applied_by_id = leave_applied_by_id
-            record.leave_applied_at = datetime.utcnow()
-            record.leave_status = LeaveStatusEnum.PENDING
-            
-            # Update comments
-            if comment_json:
-                if record.comment_json:
-                    record.comment_json.update(comment_json)
-                else:
-                    record.comment_json = comment_json
-            
-            if reason and record.comment_json:
-                record.comment_json['leave_reason'] = reason
-            
-            record.updated_by_id = leave_applied_by_id
+            # On an existing row only the requested halves are switched to leave
+            set_ = {
+                'leave_applied_by_id': stmt.excluded.leave_applied_by_id,
+                'leave_applied_at': stmt.excluded.leave_applied_at,
+                'leave_status': stmt.excluded.leave_status,
+                'updated_by_id': stmt.excluded.updated_by_id,
+                'comment_json': _merge_comment_json(stmt.excluded.comment_json),
+                'updated_at': func.now(),
+            }
+            if first_half_leave:
+                set_['first_half'] = stmt.excluded.first_half
+            if second_half_leave:
+                set_['second_half'] = stmt.excluded.second_half
             
-            self.db.commit()
-            self.db.refresh(record)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['employee_id', 'attendance_date'],
+                set_=set_
+            ).returning(EmployeeAvailability)
+            
+            record = self.db.scalars(stmt, execution_options={"populate_existing": True}).one()
+            self._mark_written([(employee_id, record.attendance_date)])
             
             logger.info(f"Leave applied successfully: {record.attendance_id}")
             return record
@@ -262,15 +512,14 @@ class AttendanceRepository:
             # Update leave status
             record.leave_status = action
             record.leave_approved_by_id = approved_by_id
-            record.leave_approved_at = datetime.utcnow()
+            record.leave_approved_at = func.now()  # Stamped by the DB clock
             record.updated_by_id = approved_by_id
             
-            # Update comments
+            # Merge comments server-side (jsonb ||); refreshed after commit
             if comments:
-                if record.comment_json:
-                    record.comment_json['approval_comments'] = comments
-                else:
-                    record.comment_json = {'approval_comments': comments}
+                record.comment_json = _merge_comment_json(
+                    literal({'approval_comments': comments}, JSONB)
+                )
             
             # If rejected, revert leave status to present
             if action == LeaveStatusEnum.REJECTED:
@@ -279,8 +528,8 @@ class AttendanceRepository:
                 if record.second_half == HalfStatusEnum.LEAVE:
                     record.second_half = HalfStatusEnum.PRESENT
             
-            self.db.commit()
-            self.db.refresh(record)
+            self.db.flush()
+            self._mark_written([(record.employee_id, record.attendance_date)])
             
             logger.info(f"Leave {action.value} processed successfully: {attendance_id}")
             return record
@@ -293,47 +542,104 @@ class AttendanceRepository:
             logger.error(f"Error processing leave action: {str(e)}")
             raise
     
-    def check_in(self, employee_id: int, check_in_location_id: int,
-                check_in_time: Optional[datetime] = None,
-                updated_by_id: int = None,
-                comment_json: Optional[Dict] = None) -> EmployeeAvailability:
-        """Record employee check-in."""
-        logger.info(f"Recording check-in for employee {employee_id}")
+    def process_leave_action_many(self, attendance_ids: List[int], action: LeaveStatusEnum,
+                                  approved_by_id: int, comments: Optional[str] = None) -> List[int]:
+        """
+        Approve or reject many pending leave requests in one UPDATE.
+        
+        Returns the IDs that were processed; IDs that do not exist, are no
+        longer pending or belong to the approver are left untouched.
+        """
+        logger.info(f"Processing leave {action.value} for {len(attendance_ids)} attendance records")
+        
+        if not attendance_ids:
+            return []
         
         try:
-            today = date.today()
-            check_in_time = check_in_time or datetime.utcnow()
+            values = {
+                'leave_status': action,
+                'leave_approved_by_id': approved_by_id,
+                'leave_approved_at': func.now(),
+                'updated_by_id': approved_by_id,
+            }
             
-            # Get or create today's attendance record
-            record = self.get_by_employee_date(employee_id, today)
+            if comments:
+                values['comment_json'] = _merge_comment_json(
+                    literal({'approval_comments': comments}, JSONB)
+                )
             
-            if not record:
-                # Create new record
-                record = EmployeeAvailability(
-                    employee_id=employee_id,
-                    attendance_date=today,
-                    day_type=DayTypeEnum.WORKDAY,
-                    first_half=HalfStatusEnum.PRESENT,
-                    second_half=HalfStatusEnum.PRESENT,
-                    shift_id=1,  # Default shift
-                    updated_by_id=updated_by_id or employee_id
+            # If rejected, revert leave halves to present in the same statement
+            if action == LeaveStatusEnum.REJECTED:
+                values['first_half'] = case(
+                    (EmployeeAvailability.first_half == HalfStatusEnum.LEAVE, HalfStatusEnum.PRESENT),
+                    else_=EmployeeAvailability.first_half
+                )
+                values['second_half'] = case(
+                    (EmployeeAvailability.second_half == HalfStatusEnum.LEAVE, HalfStatusEnum.PRESENT),
+                    else_=EmployeeAvailability.second_half
                 )
-                self.db.add(record)
             
-            # Update check-in details
-            record.check_in_time = check_in_time
-            record.check_in_location_id = check_in_location_id
-            record.updated_by_id = updated_by_id or employee_id
+            stmt = update(EmployeeAvailability).where(
+                EmployeeAvailability.attendance_id.in_(attendance_ids),
+                EmployeeAvailability.leave_status == LeaveStatusEnum.PENDING,
+                EmployeeAvailability.employee_id != approved_by_id
+            ).values(**values).returning(
+                EmployeeAvailability.attendance_id, EmployeeAvailability.employee_id,
+                EmployeeAvailability.attendance_date
+            )
+            
+            processed = self.db.execute(
+                stmt, execution_options={"synchronize_session": "fetch"}
+            ).all()
+            processed_ids = [row.attendance_id for row in processed]
+            self._mark_written((row.employee_id, row.attendance_date) for row in processed)
             
-            # Update comments
-            if comment_json:
-                if record.comment_json:
-                    record.comment_json.update(comment_json)
-                else:
-                    record.comment_json = comment_json
+            logger.info(f"Leave {action.value} processed for {len(processed_ids)} attendance records")
+            return processed_ids
             
-            self.db.commit()
-            self.db.refresh(record)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error processing bulk leave action: {str(e)}")
+            raise
+    
+    def check_in(self, employee_id: int, check_in_location_id: int,
+                check_in_time: Optional[datetime] = None,
+                updated_by_id: int = None,
+                comment_json: Optional[Dict] = None) -> EmployeeAvailability:
+        """Record employee check-in (single INSERT ... ON CONFLICT DO UPDATE)."""
+        logger.info(f"Recording check-in for employee {employee_id}")
+        
+        try:
+            today = date.today()
+            # Without an explicit time the DB clock stamps the check-in
+            check_in_time = check_in_time or func.now()
+            updated_by_id = updated_by_id or employee_id
+            
+            stmt = pg_insert(EmployeeAvailability).values(
+                employee_id=employee_id,
+                attendance_date=today,
+                day_type=DayTypeEnum.WORKDAY,
+                first_half=HalfStatusEnum.PRESENT,
+                second_half=HalfStatusEnum.PRESENT,
+                shift_id=1,  # Default shift
+                check_in_time=check_in_time,
+                check_in_location_id=check_in_location_id,
+                updated_by_id=updated_by_id,
+                comment_json=comment_json or {}
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['employee_id', 'attendance_date'],
+                set_={
+                    'check_in_time': stmt.excluded.check_in_time,
+                    'check_in_location_id': stmt.excluded.check_in_location_id,
+                    'updated_by_id': stmt.excluded.updated_by_id,
+                    'comment_json': _merge_comment_json(stmt.excluded.comment_json),
+                    'updated_at': func.now(),
+                }
+            ).returning(EmployeeAvailability)
+            
+            record = self.db.scalars(stmt, execution_options={"populate_existing": True}).one()
+            self._mark_written([(employee_id, record.attendance_date)])
             
             logger.info(f"Check-in recorded successfully: {record.attendance_id}")
             return record
@@ -347,41 +653,39 @@ class AttendanceRepository:
                  check_out_time: Optional[datetime] = None,
                  updated_by_id: int = None,
                  comment_json: Optional[Dict] = None) -> EmployeeAvailability:
-        """Record employee check-out."""
+        """Record employee check-out (single UPDATE ... RETURNING)."""
         logger.info(f"Recording check-out for employee {employee_id}")
         
         try:
             today = date.today()
-            check_out_time = check_out_time or datetime.utcnow()
+            check_out_time = literal(check_out_time, DateTime(timezone=True)) if check_out_time else func.now()
             
-            # Get today's attendance record
-            record = self.get_by_employee_date(employee_id, today)
+            # Work hours are computed from the stored check-in time in the same statement
+            stmt = update(EmployeeAvailability).where(
+                EmployeeAvailability.employee_id == employee_id,
+                EmployeeAvailability.attendance_date == today,
+                EmployeeAvailability.check_in_time.isnot(None)
+            ).values(
+                check_out_time=check_out_time,
+                check_out_location_id=check_out_location_id,
+                updated_by_id=updated_by_id or employee_id,
+                total_workhours=_workhours(EmployeeAvailability.check_in_time, check_out_time),
+                comment_json=_merge_comment_json(literal(comment_json or {}, JSONB))
+            ).returning(EmployeeAvailability)
+            
+            record = self._execute_returning(stmt).one_or_none()
             
             if not record:
-                raise ValueError(f"No attendance record found for employee {employee_id} today")
-            
-            if not record.check_in_time:
+                # Nothing updated: tell apart a missing record from a missing check-in
+                exists = self.db.query(EmployeeAvailability.attendance_id).filter(
+                    EmployeeAvailability.employee_id == employee_id,
+                    EmployeeAvailability.attendance_date == today
+                ).scalar() is not None
+                if not exists:
+                    raise ValueError(f"No attendance record found for employee {employee_id} today")
                 raise ValueError("Cannot check out without checking in first")
             
-            # Update check-out details
-            record.check_out_time = check_out_time
-            record.check_out_location_id = check_out_location_id
-            record.updated_by_id = updated_by_id or employee_id
-            
-            # Calculate work hours
-            if record.check_in_time:
-                work_hours = (check_out_time - record.check_in_time).total_seconds() / 3600
-                record.total_workhours = round(work_hours, 2)
-            
-            # Update comments
-            if comment_json:
-                if record.comment_json:
-                    record.comment_json.update(comment_json)
-                else:
-                    record.comment_json = comment_json
-            
-            self.db.commit()
-            self.db.refresh(record)
+            self._mark_written([(employee_id, today)])
             
             logger.info(f"Check-out recorded successfully: {record.attendance_id}")
             return record
@@ -399,47 +703,57 @@ class AttendanceRepository:
         logger.debug(f"Getting monthly summary for employee {employee_id}, {month}/{year}")
         
         try:
-            # Calculate date range
-            import calendar
-            _, last_day = calendar.monthrange(year, month)
+            # Calculate date range; month end is the day before next month's 1st
             start_date = date(year, month, 1)
-            end_date = date(year, month, last_day)
-            
-            # Query attendance records
-            records = self.db.query(EmployeeAvailability).filter(
-                EmployeeAvailability.employee_id == employee_id,
-                EmployeeAvailability.attendance_date >= start_date,
-                EmployeeAvailability.attendance_date <= end_date
-            ).all()
-            
-            # Calculate statistics
-            total_days = len(records)
-            present_days = 0
-            leave_days = 0
-            absent_days = 0
-            weekoff_days = 0
-            holiday_days = 0
-            total_work_hours = 0
-            
-            for record in records:
-                if record.day_type == DayTypeEnum.WEEKOFF:
-                    weekoff_days += 1
-                elif record.day_type == DayTypeEnum.HOLIDAY or record.day_type == DayTypeEnum.COMP_OFF:
-                    holiday_days += 1
-                elif record.first_half == HalfStatusEnum.PRESENT and record.second_half == HalfStatusEnum.PRESENT:
-                    present_days += 1
-                elif record.first_half == HalfStatusEnum.LEAVE or record.second_half == HalfStatusEnum.LEAVE:
-                    leave_days += 1
-                else:
-                    absent_days += 1
-                
-                if record.total_workhours:
-                    total_work_hours += float(record.total_workhours)
+            end_date = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+            
+            # Closed months older than last month come from the rollup view
+            # unless a write has marked them dirty since its last refresh
+            # (this session's own uncommitted writes included); recent and
+            # dirty months are aggregated live
+            
+            # The employee's name rides along as a scalar subquery
+            employee_name = select(ExistingUser.full_name).where(
+                ExistingUser.user_id == employee_id
+            ).scalar_subquery().label('employee_name')
+            
+            summary = None
+            if start_date < _rollup_cutoff():
+                dirty = select(MonthlySummaryDirty.employee_id).where(
+                    MonthlySummaryDirty.employee_id == employee_id,
+                    MonthlySummaryDirty.year == year,
+                    MonthlySummaryDirty.month == month
+                ).exists()
+                summary = self.db.execute(
+                    select(monthly_summary_view, employee_name).where(
+                        monthly_summary_view.c.employee_id == employee_id,
+                        monthly_summary_view.c.year == year,
+                        monthly_summary_view.c.month == month,
+                        ~dirty
+                    )
+                ).first()
+            
+            if summary is None:
+                # Aggregate in the database; one row of scalars comes back
+                summary = self.db.query(employee_name, *monthly_summary_columns()).filter(
+                    EmployeeAvailability.employee_id == employee_id,
+                    EmployeeAvailability.attendance_date >= start_date,
+                    EmployeeAvailability.attendance_date <= end_date
+                ).one()
+            
+            total_days = summary.total_days
+            present_days = summary.present_days
+            leave_days = summary.leave_days
+            weekoff_days = summary.weekoff_days
+            holiday_days = summary.holiday_days
+            absent_days = total_days - weekoff_days - holiday_days - present_days - leave_days
+            total_work_hours = float(summary.total_work_hours)
             
             avg_daily_hours = total_work_hours / present_days if present_days > 0 else 0
             
             return {
                 'employee_id': employee_id,
+                'employee_name': summary.employee_name or '',
                 'month': month,
                 'year': year,
                 'total_days': total_days,
@@ -449,9 +763,49 @@ class AttendanceRepository:
                 'weekoff_days': weekoff_days,
                 'holiday_days': holiday_days,
                 'total_work_hours': round(total_work_hours, 2),
-                'avg_daily_hours': round(avg_daily_hours, 2)
+                'avg_daily_hours': round(avg_daily_hours, 2),
+                'half_day_leaves': summary.half_day_leaves,
+                'full_day_leaves': summary.full_day_leaves
             }
             
         except Exception as e:
             logger.error(f"Error getting monthly summary: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    def refresh_monthly_summary(self, only_if_dirty: bool = False) -> bool:
+        """
+        Refresh the monthly summary rollup view and clear the dirty months.
+        
+        Runs in its own transaction and commits. Returns False without
+        refreshing when another worker holds the refresh lock, or, with
+        `only_if_dirty`, when no month has been written since the last
+        refresh. Months marked dirty by writes committed after the clear
+        stay dirty and are read live until the following refresh.
+        """
+        logger.debug("Refreshing monthly attendance summary view")
+        
+        try:
+            if only_if_dirty and not self.db.execute(
+                select(select(MonthlySummaryDirty.employee_id).exists())
+            ).scalar():
+                self.db.rollback()
+                return False
+            
+            lock_key = func.hashtext(MONTHLY_SUMMARY_VIEW)
+            locked = self.db.execute(select(func.pg_try_advisory_xact_lock(lock_key))).scalar()
+            if not locked:
+                self.db.rollback()
+                logger.debug("Monthly summary refresh already running elsewhere")
+                return False
+            
+            # Clear before refreshing: the refresh's later snapshot covers
+            # every write whose dirty mark is cleared here
+            self.db.execute(delete(MonthlySummaryDirty))
+            self.db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {MONTHLY_SUMMARY_VIEW}"))
+            self.db.commit()
+            return True
+            
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error refreshing monthly summary view: {str(e)}")
+            raise
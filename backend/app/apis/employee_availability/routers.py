@@ -12,6 +12,8 @@ from .services import AttendanceService
 from .schemas import (
     EmployeeAvailabilityCreate, EmployeeAvailabilityUpdate, EmployeeAvailabilityResponse,
     AttendanceListResponse, AttendanceFilter, LeaveApplyRequest, LeaveActionRequest,
+    LeaveBulkActionRequest, LeaveBulkActionResponse,
+    BulkAttendanceCreate, AttendanceBulkUpdate, AttendanceBulkResponse,
     CheckInRequest, CheckOutRequest, AttendanceSummaryResponse
 )
 
@@ -34,18 +36,48 @@ def get_db() -> Session:
         db.close()
 
 
+def get_db_ro() -> Session:
+    """
+    FastAPI dependency for a read-only database session.
+    
+    The connection runs in autocommit with PostgreSQL read-only set, so
+    GET endpoints issue no BEGIN/COMMIT and cannot write by accident.
+    """
+    db = SessionLocal()
+    try:
+        db.connection(execution_options={"isolation_level": "AUTOCOMMIT", "postgresql_readonly": True})
+        yield db
+    finally:
+        db.close()
+
+
 def get_attendance_repository(db: Session = Depends(get_db)) -> AttendanceRepository:
     return AttendanceRepository(db)
 
 
+def get_attendance_repository_ro(db: Session = Depends(get_db_ro)) -> AttendanceRepository:
+    return AttendanceRepository(db)
+
+
 def get_attendance_service(
     attendance_repo: AttendanceRepository = Depends(get_attendance_repository)
 ) -> AttendanceService:
     return AttendanceService(attendance_repo)
 
 
+def get_attendance_service_ro(
+    attendance_repo: AttendanceRepository = Depends(get_attendance_repository_ro)
+) -> AttendanceService:
+    return AttendanceService(attendance_repo)
+
+
+def get_current_user_id(request: Request) -> int:
+    """FastAPI dependency for the authenticated user's ID."""
+    return AttendanceService.get_current_user_id(request)
+
+
 @router.get("/", response_model=AttendanceListResponse)
-async def get_attendances(
+def get_attendances(
     request: Request ,
     employee_id: Optional[int] = Query(None, description="Filter by employee ID"),
     start_date: Optional[date] = Query(None, description="Start date filter"),
@@ -59,9 +91,14 @@ async def get_attendances(
     shift_id: Optional[int] = Query(None, description="Shift ID filter"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    sort_by: str = Query("attendance_date", description="Field to sort by"),
-    sort_order: str = Query("desc", description="Sort order (asc/desc)"),
-    attendance_service: AttendanceService = Depends(get_attendance_service)
+    sort_by: str = Query(
+        "attendance_date",
+        pattern="^(attendance_date|employee_id|attendance_id)$",
+        description="Field to sort by (attendance_date/employee_id/attendance_id)"
+    ),
+    sort_order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order (asc/desc)"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor (next_cursor of the previous page)"),
+    attendance_service: AttendanceService = Depends(get_attendance_service_ro)
 ):
     """
     Get filtered attendance records.
@@ -81,6 +118,7 @@ async def get_attendances(
     - **shift_id**: Filter by shift ID
     - **sort_by**: Field to sort by
     - **sort_order**: Sort order
+    - **cursor**: Continue from a previous page's next_cursor (skips the total count)
     - Returns: Filtered attendance records with pagination
     """
     logger.info("Get attendances endpoint called")
@@ -105,14 +143,15 @@ async def get_attendances(
         skip=skip,
         limit=limit,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        cursor=cursor
     )
 
 @router.get("/{attendance_id}", response_model=EmployeeAvailabilityResponse)
-async def get_attendance(
+def get_attendance(
     attendance_id: int,
     request: Request ,
-    attendance_service: AttendanceService = Depends(get_attendance_service)
+    attendance_service: AttendanceService = Depends(get_attendance_service_ro)
 ):
     """
     Get attendance record by ID.
@@ -120,11 +159,11 @@ async def get_attendance(
     - **attendance_id**: Attendance record ID
     - Returns: Attendance details
     """
-    logger.info(f"Get attendance endpoint called for ID: {attendance_id}")
+    logger.info("Get attendance endpoint called for ID: %s", attendance_id)
     return attendance_service.get_attendance(attendance_id, request)
 
 @router.post("/", response_model=EmployeeAvailabilityResponse, status_code=201)
-async def create_attendance(
+def create_attendance(
     attendance_data: EmployeeAvailabilityCreate,
     request: Request ,
     attendance_service: AttendanceService = Depends(get_attendance_service)
@@ -140,9 +179,43 @@ async def create_attendance(
     return attendance_service.create_attendance(attendance_data, request)
 
 
+@router.post("/bulk", response_model=AttendanceBulkResponse, status_code=201)
+def create_attendances_bulk(
+    bulk_data: BulkAttendanceCreate,
+    request: Request,
+    attendance_service: AttendanceService = Depends(get_attendance_service)
+):
+    """
+    Create or overwrite many attendance records at once.
+    
+    - **Requires**: attendance.edit permission
+    - **Request Body**: Attendance records; existing (employee, date) rows are overwritten
+    - Returns: Attendance IDs in request order
+    """
+    logger.info("Bulk create attendance endpoint called")
+    return attendance_service.create_attendances_bulk(bulk_data, request)
+
+
+@router.put("/bulk", response_model=AttendanceBulkResponse)
+def update_attendances_bulk(
+    bulk_data: AttendanceBulkUpdate,
+    request: Request,
+    attendance_service: AttendanceService = Depends(get_attendance_service)
+):
+    """
+    Apply the same update to many attendance records.
+    
+    - **Requires**: attendance.edit permission
+    - **Request Body**: Attendance IDs and the fields to update
+    - Returns: Updated and skipped attendance IDs
+    """
+    logger.info("Bulk update attendance endpoint called")
+    return attendance_service.update_attendances_bulk(bulk_data, request)
+
+
 
 @router.put("/{attendance_id}", response_model=EmployeeAvailabilityResponse)
-async def update_attendance(
+def update_attendance(
     attendance_id: int,
     request: Request,
     update_data: EmployeeAvailabilityUpdate,
@@ -155,12 +228,12 @@ async def update_attendance(
     - **Request Body**: Attendance data to update
     - Returns: Updated attendance record
     """
-    logger.info(f"Update attendance endpoint called for ID: {attendance_id}")
+    logger.info("Update attendance endpoint called for ID: %s", attendance_id)
     return attendance_service.update_attendance(attendance_id, update_data, request)
 
 
 @router.delete("/{attendance_id}")
-async def delete_attendance(
+def delete_attendance(
     attendance_id: int,
     request: Request,
     attendance_service: AttendanceService = Depends(get_attendance_service)
@@ -169,15 +242,15 @@ async def delete_attendance(
     Delete attendance record.
     
     - **attendance_id**: Attendance record ID
-    - **Requires**: Admin privileges
+    - **Requires**: attendance.edit permission
     - Returns: Success message
     """
-    logger.info(f"Delete attendance endpoint called for ID: {attendance_id}")
+    logger.info("Delete attendance endpoint called for ID: %s", attendance_id)
     return attendance_service.delete_attendance(attendance_id, request)
 
 
 @router.post("/apply-leave", response_model=EmployeeAvailabilityResponse)
-async def apply_leave(
+def apply_leave(
     request: Request,
     leave_data: LeaveApplyRequest,
     attendance_service: AttendanceService = Depends(get_attendance_service)
@@ -185,6 +258,7 @@ async def apply_leave(
     """
     Apply for leave.
     
+    - **Requires**: Self-access, or attendance.edit permission for another employee
     - **Request Body**: Leave application data
     - Returns: Updated attendance record
     """
@@ -193,7 +267,7 @@ async def apply_leave(
 
 
 @router.post("/process-leave", response_model=EmployeeAvailabilityResponse)
-async def process_leave(
+def process_leave(
     request: Request,
     leave_action: LeaveActionRequest,
     attendance_service: AttendanceService = Depends(get_attendance_service)
@@ -201,7 +275,8 @@ async def process_leave(
     """
     Approve or reject leave.
     
-    - **Requires**: Admin privileges
+    - **Requires**: leave.approve (approve) or leave.reject (reject) permission;
+      approvers cannot act on their own leave
     - **Request Body**: Leave action data
     - Returns: Updated attendance record
     """
@@ -209,8 +284,25 @@ async def process_leave(
     return attendance_service.process_leave_action(leave_action, request)
 
 
+@router.post("/process-leave-bulk", response_model=LeaveBulkActionResponse)
+def process_leave_bulk(
+    request: Request,
+    leave_action: LeaveBulkActionRequest,
+    attendance_service: AttendanceService = Depends(get_attendance_service)
+):
+    """
+    Approve or reject many leave requests at once.
+    
+    - **Requires**: leave.approve (approve) or leave.reject (reject) permission
+    - **Request Body**: Attendance IDs and leave action
+    - Returns: Processed IDs and IDs skipped (not found, not pending or the approver's own)
+    """
+    logger.info("Process leave bulk endpoint called")
+    return attendance_service.process_leave_action_many(leave_action, request)
+
+
 @router.post("/check-in", response_model=EmployeeAvailabilityResponse)
-async def check_in(
+def check_in(
     request: Request,
     check_in_data: CheckInRequest,
     attendance_service: AttendanceService = Depends(get_attendance_service)
@@ -218,6 +310,7 @@ async def check_in(
     """
     Record employee check-in.
     
+    - **Requires**: Self-access, or attendance.edit permission for another employee
     - **Request Body**: Check-in data
     - Returns: Updated attendance record
     """
@@ -226,7 +319,7 @@ async def check_in(
 
 
 @router.post("/check-out", response_model=EmployeeAvailabilityResponse)
-async def check_out(
+def check_out(
     request: Request,
     check_out_data: CheckOutRequest,
     attendance_service: AttendanceService = Depends(get_attendance_service)
@@ -234,6 +327,7 @@ async def check_out(
     """
     Record employee check-out.
     
+    - **Requires**: Self-access, or attendance.edit permission for another employee
     - **Request Body**: Check-out data
     - Returns: Updated attendance record
     """
@@ -242,12 +336,12 @@ async def check_out(
 
 
 @router.get("/monthly-summary/{employee_id}")
-async def get_monthly_summary(
+def get_monthly_summary(
     employee_id: int,
     request: Request,
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
     year: int = Query(..., description="Year"),
-    attendance_service: AttendanceService = Depends(get_attendance_service)
+    attendance_service: AttendanceService = Depends(get_attendance_service_ro)
 ):
     """
     Get monthly attendance summary for employee.
@@ -257,16 +351,16 @@ async def get_monthly_summary(
     - **year**: Year
     - Returns: Monthly attendance summary
     """
-    logger.info(f"Get monthly summary endpoint called for employee {employee_id}")
+    logger.info("Get monthly summary endpoint called for employee %s", employee_id)
     return attendance_service.get_monthly_summary(employee_id, month, year, request)
 
 
 
 @router.get("/today/{employee_id}", response_model=Optional[EmployeeAvailabilityResponse])
-async def get_today_attendance(
+def get_today_attendance(
     employee_id: int,
     request: Request,
-    attendance_service: AttendanceService = Depends(get_attendance_service)
+    attendance_service: AttendanceService = Depends(get_attendance_service_ro)
 ):
     """
     Get today's attendance for employee.
@@ -274,14 +368,15 @@ async def get_today_attendance(
     - **employee_id**: Employee ID
     - Returns: Today's attendance record or null
     """
-    logger.info(f"Get today's attendance endpoint called for employee {employee_id}")
+    logger.info("Get today's attendance endpoint called for employee %s", employee_id)
     return attendance_service.get_today_attendance(employee_id, request)
 
 
 @router.get("/my-today", response_model=Optional[EmployeeAvailabilityResponse])
-async def get_my_today_attendance(
+def get_my_today_attendance(
     request: Request,
-    attendance_service: AttendanceService = Depends(get_attendance_service)
+    attendance_service: AttendanceService = Depends(get_attendance_service_ro),
+    current_user_id: int = Depends(get_current_user_id)
 ):
     """
     Get current user's today attendance.
@@ -289,9 +384,6 @@ async def get_my_today_attendance(
     - Returns: Today's attendance record for current user
     """
     logger.info("Get my today's attendance endpoint called")
-    
-    # Get current user ID from token
-    current_user_id = attendance_service.get_current_user_id(request)
     return attendance_service.get_today_attendance(current_user_id, request)
 
 
@@ -347,15 +439,14 @@ async def get_my_today_attendance(
 # Line ~246 - Fix my_check_in route
 
 @router.post("/my-check-in", response_model=EmployeeAvailabilityResponse)
-async def my_check_in(
+def my_check_in(
     request: Request,
     check_in_location_id: int = Query(..., description="Check-in location ID"),
     attendance_service: AttendanceService = Depends(get_attendance_service),
+    current_user_id: int = Depends(get_current_user_id),
 ):
     logger.info("My check-in endpoint called")
 
-    current_user_id = attendance_service.get_current_user_id(request)
-
     check_in_data = CheckInRequest(
         employee_id=current_user_id,
         check_in_location_id=check_in_location_id,
@@ -365,15 +456,14 @@ async def my_check_in(
 
 
 @router.post("/my-check-out", response_model=EmployeeAvailabilityResponse)
-async def my_check_out(
+def my_check_out(
     request: Request,
     check_out_location_id: int = Query(..., description="Check-out location ID"),
     attendance_service: AttendanceService = Depends(get_attendance_service),
+    current_user_id: int = Depends(get_current_user_id),
 ):
     logger.info("My check-out endpoint called")
 
-    current_user_id = attendance_service.get_current_user_id(request)
-
     check_out_data = CheckOutRequest(
         employee_id=current_user_id,
         check_out_location_id=check_out_location_id,
@@ -383,11 +473,12 @@ async def my_check_out(
 
 
 @router.get("/my-monthly-summary")
-async def get_my_monthly_summary(
+def get_my_monthly_summary(
     request: Request,
     month: int = Query(..., ge=1, le=12, description="Month (1-12)"),
     year: int = Query(..., description="Year"),
-    attendance_service: AttendanceService = Depends(get_attendance_service)
+    attendance_service: AttendanceService = Depends(get_attendance_service_ro),
+    current_user_id: int = Depends(get_current_user_id)
 ):
     """
     Get current user's monthly attendance summary.
@@ -397,7 +488,4 @@ async def get_my_monthly_summary(
     - Returns: Monthly attendance summary
     """
     logger.info("Get my monthly summary endpoint called")
-    
-    # Get current user ID from token
-    current_user_id = attendance_service.get_current_user_id(request)
     return attendance_service.get_monthly_summary(current_user_id, month, year, request)
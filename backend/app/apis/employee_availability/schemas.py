@@ -180,7 +180,7 @@
 
 
 # app/apis/attendance/schemas.py
-from pydantic import BaseModel, Field, validator, ConfigDict, field_validator
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date, time
 from enum import Enum
@@ -207,6 +207,13 @@ class LeaveStatus(str, Enum):
     REJECTED = "rejected"
 
 
+# Value -> member maps for from_record; the ORM enums are str subclasses,
+# so their members hash and compare equal to these keys
+_DAY_TYPES = {member.value: member for member in DayType}
+_HALF_STATUSES = {member.value: member for member in HalfStatus}
+_LEAVE_STATUSES = {member.value: member for member in LeaveStatus}
+
+
 # Base schemas
 class EmployeeAvailabilityBase(BaseModel):
     employee_id: int
@@ -220,7 +227,7 @@ class EmployeeAvailabilityBase(BaseModel):
     check_out_location_id: Optional[int] = None
     total_workhours: Optional[float] = Field(None, ge=0, le=24)
     shift_id: int
-    comment_json: Optional[Dict[str, Any]] = {}
+    comment_json: Optional[Dict[str, Any]] = Field(default_factory=dict)
     
     @field_validator('attendance_date')
     @classmethod
@@ -228,13 +235,6 @@ class EmployeeAvailabilityBase(BaseModel):
         if v > date.today():
             raise ValueError('Attendance date cannot be in the future')
         return v
-    
-    @field_validator('total_workhours')
-    @classmethod
-    def validate_workhours(cls, v):
-        if v is not None and (v < 0 or v > 24):
-            raise ValueError('Work hours must be between 0 and 24')
-        return v
 
 
 class EmployeeAvailabilityCreate(EmployeeAvailabilityBase):
@@ -265,7 +265,7 @@ class LeaveApplyRequest(BaseModel):
     attendance_date: date
     half_type: str = Field(..., pattern="^(first|second|full)$")
     reason: Optional[str] = None
-    comment_json: Optional[Dict[str, Any]] = {}
+    comment_json: Optional[Dict[str, Any]] = Field(default_factory=dict)
     leave_applied_by_id: int  # Who is applying the leave
 
 
@@ -277,12 +277,19 @@ class LeaveActionRequest(BaseModel):
     leave_approved_by_id: int  # Who is approving/rejecting
 
 
+class LeaveBulkActionRequest(BaseModel):
+    """Schema for approving/rejecting many leave requests at once."""
+    attendance_ids: List[int] = Field(..., min_length=1)
+    action: LeaveStatus = LeaveStatus.APPROVED
+    comments: Optional[str] = None
+
+
 class CheckInRequest(BaseModel):
     """Schema for check-in."""
     employee_id: int
     check_in_location_id: int
     check_in_time: Optional[datetime] = None
-    comment_json: Optional[Dict[str, Any]] = {}
+    comment_json: Optional[Dict[str, Any]] = Field(default_factory=dict)
     updated_by_id: int  # Who is performing the check-in
 
 
@@ -291,7 +298,7 @@ class CheckOutRequest(BaseModel):
     employee_id: int
     check_out_location_id: int
     check_out_time: Optional[datetime] = None
-    comment_json: Optional[Dict[str, Any]] = {}
+    comment_json: Optional[Dict[str, Any]] = Field(default_factory=dict)
     updated_by_id: int  # Who is performing the check-out
 
 
@@ -318,6 +325,40 @@ class EmployeeAvailabilityResponse(EmployeeAvailabilityBase):
     updated_by_name: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
+    
+    @classmethod
+    def from_record(cls, record, names: Dict[str, str]) -> "EmployeeAvailabilityResponse":
+        """Build from a trusted EmployeeAvailability row without re-validating."""
+        return cls.model_construct(
+            attendance_id=record.attendance_id,
+            employee_id=record.employee_id,
+            attendance_date=record.attendance_date,
+            day_type=_DAY_TYPES[record.day_type],
+            first_half=_HALF_STATUSES[record.first_half],
+            second_half=_HALF_STATUSES[record.second_half],
+            check_in_time=record.check_in_time,
+            check_in_location_id=record.check_in_location_id,
+            check_out_time=record.check_out_time,
+            check_out_location_id=record.check_out_location_id,
+            total_workhours=float(record.total_workhours) if record.total_workhours else None,
+            shift_id=record.shift_id,
+            leave_applied_by_id=record.leave_applied_by_id,
+            leave_applied_at=record.leave_applied_at,
+            leave_status=_LEAVE_STATUSES[record.leave_status] if record.leave_status else None,
+            leave_approved_by_id=record.leave_approved_by_id,
+            leave_approved_at=record.leave_approved_at,
+            comment_json=record.comment_json,
+            updated_by_id=record.updated_by_id,
+            updated_at=record.updated_at,
+            created_at=record.created_at,
+            **names
+        )
+
+
+class LeaveBulkActionResponse(BaseModel):
+    """Result of a bulk leave action."""
+    processed_ids: List[int]
+    skipped_ids: List[int]  # Not found or no longer pending
 
 
 class AttendanceSummaryResponse(BaseModel):
@@ -342,10 +383,11 @@ class AttendanceSummaryResponse(BaseModel):
 class AttendanceListResponse(BaseModel):
     """Paginated list response."""
     attendances: List[EmployeeAvailabilityResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None for cursor pages
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 
 # Filter schemas
@@ -362,13 +404,11 @@ class AttendanceFilter(BaseModel):
     leave_status: Optional[LeaveStatus] = None
     shift_id: Optional[int] = None
     
-    @field_validator('end_date')
-    @classmethod
-    def validate_date_range(cls, v, info):
-        start_date = info.data.get('start_date')
-        if start_date and v and v < start_date:
+    @model_validator(mode='after')
+    def validate_date_range(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
             raise ValueError('End date must be after start date')
-        return v
+        return self
 
 
 # Statistics schemas
@@ -400,4 +440,10 @@ class AttendanceBulkUpdate(BaseModel):
     """Schema for bulk attendance updates."""
     attendance_ids: List[int]
     updates: EmployeeAvailabilityUpdate
-    updated_by_id: int
\ No newline at end of file
+    updated_by_id: int
+
+
+class AttendanceBulkResponse(BaseModel):
+    """Result of a bulk attendance write."""
+    processed_ids: List[int]
+    skipped_ids: List[int] = []  # Update only: IDs that do not exist
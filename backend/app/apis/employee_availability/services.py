@@ -1,14 +1,17 @@
 # app/apis/attendance/services.py
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, date
 from fastapi import HTTPException, status
 
 from app.core.security import security_service
+from app.core.permission_checker import PermissionChecker
 from .repositories import AttendanceRepository
 from .schemas import (
     EmployeeAvailabilityCreate, EmployeeAvailabilityUpdate, EmployeeAvailabilityResponse,
     AttendanceListResponse, AttendanceFilter, LeaveApplyRequest, LeaveActionRequest,
+    LeaveBulkActionRequest, LeaveBulkActionResponse,
+    BulkAttendanceCreate, AttendanceBulkUpdate, AttendanceBulkResponse,
     CheckInRequest, CheckOutRequest, AttendanceSummaryResponse, AttendanceStatsResponse
 )
 
@@ -21,8 +24,18 @@ class AttendanceService:
     def __init__(self, attendance_repo: AttendanceRepository):
         self.attendance_repo = attendance_repo
     
-    def get_current_user_id(self, request) -> int:
-        """Extract current user ID from request."""
+    @staticmethod
+    def get_current_user_id(request) -> int:
+        """
+        Extract current user ID from request.
+        
+        The decoded ID is kept on request.state, so the router and the
+        service verify the token once per request.
+        """
+        cached_user_id = getattr(request.state, "current_user_id", None)
+        if cached_user_id is not None:
+            return cached_user_id
+        
         auth_header = request.headers.get("Authorization")
         if not auth_header:
             raise HTTPException(
@@ -40,6 +53,7 @@ class AttendanceService:
                 detail="Invalid token payload"
             )
         
+        request.state.current_user_id = user_id
         return user_id
     
     def verify_admin_access(self, user_id: int):
@@ -54,6 +68,14 @@ class AttendanceService:
         if user_id != employee_id:
             self.verify_admin_access(user_id)
     
+    def verify_permission(self, user_id: int, permission_key: str):
+        """Verify user has permission, otherwise raise 403."""
+        PermissionChecker.verify_permission(self.attendance_repo.db, user_id, permission_key)
+    
+    def _commit(self):
+        """Commit the operation's writes (one transaction per request)."""
+        self.attendance_repo.db.commit()
+    
     def get_attendance(self, attendance_id: int, request) -> EmployeeAvailabilityResponse:
         """Get attendance by ID."""
         logger.debug(f"Getting attendance: {attendance_id}")
@@ -71,36 +93,8 @@ class AttendanceService:
             # Verify access
             self.verify_employee_access(current_user_id, record.employee_id)
             
-            # Convert to response
-            response_data = {
-                'attendance_id': record.attendance_id,
-                'employee_id': record.employee_id,
-                'attendance_date': record.attendance_date,
-                'day_type': record.day_type.value,
-                'first_half': record.first_half.value,
-                'second_half': record.second_half.value,
-                'check_in_time': record.check_in_time,
-                'check_in_location_id': record.check_in_location_id,
-                'check_out_time': record.check_out_time,
-                'check_out_location_id': record.check_out_location_id,
-                'total_workhours': float(record.total_workhours) if record.total_workhours else None,
-                'shift_id': record.shift_id,
-                'leave_applied_by_id': record.leave_applied_by_id,
-                'leave_applied_at': record.leave_applied_at,
-                'leave_status': record.leave_status.value if record.leave_status else None,
-                'leave_approved_by_id': record.leave_approved_by_id,
-                'leave_approved_at': record.leave_approved_at,
-                'comment_json': record.comment_json,
-                'updated_by_id': record.updated_by_id,
-                'updated_at': record.updated_at,
-                'created_at': record.created_at,
-            }
-            
-            # Add related data if available
-            if hasattr(record, 'employee') and record.employee:
-                response_data['employee_name'] = record.employee.full_name
-            
-            return EmployeeAvailabilityResponse(**response_data)
+            # Related names are eager-loaded by get_by_id
+            return EmployeeAvailabilityResponse.from_record(record, self._related_names(record))
             
         except HTTPException:
             raise
@@ -111,10 +105,57 @@ class AttendanceService:
                 detail="Internal server error"
             )
     
+    def _load_response(self, attendance_id: int) -> EmployeeAvailabilityResponse:
+        """Response for a record this request just wrote (access already verified)."""
+        record = self.attendance_repo.get_by_id(attendance_id)
+        return EmployeeAvailabilityResponse.from_record(record, self._related_names(record))
+    
+    @staticmethod
+    def _related_names(record) -> Dict[str, str]:
+        """Name fields for the response from the record's loaded relationships."""
+        names = {}
+        if record.employee:
+            names['employee_name'] = record.employee.full_name
+        if record.shift:
+            names['shift_name'] = record.shift.shift_name
+        if record.check_in_location:
+            names['check_in_location_name'] = record.check_in_location.office_name
+        if record.check_out_location:
+            names['check_out_location_name'] = record.check_out_location.office_name
+        if record.leave_applied_by:
+            names['leave_applied_by_name'] = record.leave_applied_by.full_name
+        if record.leave_approved_by:
+            names['leave_approved_by_name'] = record.leave_approved_by.full_name
+        if record.updated_by:
+            names['updated_by_name'] = record.updated_by.full_name
+        return names
+    
+    @staticmethod
+    def _encode_cursor(record) -> str:
+        """Keyset cursor for the row after which the next page starts."""
+        return f"{record.attendance_date.isoformat()}_{record.attendance_id}"
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[date, int]:
+        """Parse a cursor produced by _encode_cursor."""
+        try:
+            cursor_date, cursor_id = cursor.split("_", 1)
+            return date.fromisoformat(cursor_date), int(cursor_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
     def get_attendances(self, filters: AttendanceFilter, request, skip: int = 0, 
                        limit: int = 100, sort_by: str = "attendance_date", 
-                       sort_order: str = "desc") -> AttendanceListResponse:
-        """Search attendance records."""
+                       sort_order: str = "desc", cursor: Optional[str] = None) -> AttendanceListResponse:
+        """
+        Search attendance records.
+        
+        Offset pages (skip) carry totals; pages requested with a cursor are
+        fetched by keyset and omit total/page/total_pages.
+        """
         logger.debug(f"Getting attendances with filters")
         
         try:
@@ -127,57 +168,50 @@ class AttendanceService:
                 # Verify access to requested employee data
                 self.verify_employee_access(current_user_id, filters.employee_id)
             
+            after = None
+            if cursor:
+                if sort_by != "attendance_date":
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Cursor pagination is only supported when sorting by attendance_date"
+                    )
+                after = self._decode_cursor(cursor)
+            
             records, total = self.attendance_repo.search(
                 filters=filters,
                 skip=skip,
                 limit=limit,
                 sort_by=sort_by,
-                sort_order=sort_order
+                sort_order=sort_order,
+                after=after
             )
             
             # Convert to responses
-            attendance_responses = []
-            for record in records:
-                response_data = {
-                    'attendance_id': record.attendance_id,
-                    'employee_id': record.employee_id,
-                    'attendance_date': record.attendance_date,
-                    'day_type': record.day_type.value,
-                    'first_half': record.first_half.value,
-                    'second_half': record.second_half.value,
-                    'check_in_time': record.check_in_time,
-                    'check_in_location_id': record.check_in_location_id,
-                    'check_out_time': record.check_out_time,
-                    'check_out_location_id': record.check_out_location_id,
-                    'total_workhours': float(record.total_workhours) if record.total_workhours else None,
-                    'shift_id': record.shift_id,
-                    'leave_applied_by_id': record.leave_applied_by_id,
-                    'leave_applied_at': record.leave_applied_at,
-                    'leave_status': record.leave_status.value if record.leave_status else None,
-                    'leave_approved_by_id': record.leave_approved_by_id,
-                    'leave_approved_at': record.leave_approved_at,
-                    'comment_json': record.comment_json,
-                    'updated_by_id': record.updated_by_id,
-                    'updated_at': record.updated_at,
-                    'created_at': record.created_at,
-                }
-                
-                # Add related data if available
-                if hasattr(record, 'employee') and record.employee:
-                    response_data['employee_name'] = record.employee.full_name
-                
-                attendance_responses.append(EmployeeAvailabilityResponse(**response_data))
-            
-            # Calculate pagination
-            total_pages = (total + limit - 1) // limit if limit > 0 else 1
-            current_page = (skip // limit) + 1 if limit > 0 else 1
+            # Related names are eager-loaded by search
+            attendance_responses = [
+                EmployeeAvailabilityResponse.from_record(record, self._related_names(record))
+                for record in records
+            ]
+            
+            # A full page sorted by date can be continued by keyset
+            next_cursor = None
+            if records and len(records) == limit and sort_by == "attendance_date":
+                next_cursor = self._encode_cursor(records[-1])
+            
+            # Calculate pagination (offset mode only)
+            total_pages = None
+            current_page = None
+            if total is not None:
+                total_pages = (total + limit - 1) // limit if limit > 0 else 1
+                current_page = (skip // limit) + 1 if limit > 0 else 1
             
             return AttendanceListResponse(
                 attendances=attendance_responses,
                 total=total,
                 page=current_page,
                 page_size=limit,
-                total_pages=total_pages
+                total_pages=total_pages,
+                next_cursor=next_cursor
             )
             
         except HTTPException:
@@ -200,11 +234,12 @@ class AttendanceService:
             self.verify_employee_access(current_user_id, attendance_data.employee_id)
             
             # Convert to dict and create
-            attendance_dict = attendance_data.dict(exclude_none=True)
+            attendance_dict = attendance_data.model_dump(exclude_none=True)
             record = self.attendance_repo.create(attendance_dict, updated_by_id=current_user_id)
+            self._commit()
             
             # Return response
-            return self.get_attendance(record.attendance_id, request)
+            return self._load_response(record.attendance_id)
             
         except ValueError as e:
             raise HTTPException(
@@ -239,11 +274,12 @@ class AttendanceService:
             self.verify_employee_access(current_user_id, record.employee_id)
             
             # Update record
-            update_dict = update_data.dict(exclude_none=True)
+            update_dict = update_data.model_dump(exclude_none=True)
             self.attendance_repo.update(record, update_dict, updated_by_id=current_user_id)
+            self._commit()
             
             # Return updated response
-            return self.get_attendance(attendance_id, request)
+            return self._load_response(attendance_id)
             
         except HTTPException:
             raise
@@ -254,6 +290,72 @@ class AttendanceService:
                 detail="Internal server error"
             )
     
+    def create_attendances_bulk(self, bulk_data: BulkAttendanceCreate, request) -> AttendanceBulkResponse:
+        """Create or overwrite many attendance records in one statement."""
+        logger.info(f"Bulk creating {len(bulk_data.records)} attendance records")
+        
+        try:
+            current_user_id = self.get_current_user_id(request)
+            
+            # Overwrites any employee's records, so self-access is not enough
+            self.verify_permission(current_user_id, "attendance.edit")
+            
+            keys = [(record.employee_id, record.attendance_date) for record in bulk_data.records]
+            if len(set(keys)) != len(keys):
+                raise ValueError("Duplicate employee and date in bulk records")
+            
+            # Every row carries the same keys so the batch is one executemany
+            records = [record.model_dump(exclude={'updated_by_id'}) for record in bulk_data.records]
+            attendance_ids = self.attendance_repo.upsert_many(records, updated_by_id=current_user_id)
+            self._commit()
+            
+            return AttendanceBulkResponse(processed_ids=attendance_ids)
+            
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception(f"Error bulk creating attendance: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    
+    def update_attendances_bulk(self, bulk_data: AttendanceBulkUpdate, request) -> AttendanceBulkResponse:
+        """Apply the same update to many attendance records."""
+        logger.info(f"Bulk updating {len(bulk_data.attendance_ids)} attendance records")
+        
+        try:
+            current_user_id = self.get_current_user_id(request)
+            
+            # Rewrites any employee's records
+            self.verify_permission(current_user_id, "attendance.edit")
+            
+            update_dict = bulk_data.updates.model_dump(exclude_none=True)
+            updated_ids = self.attendance_repo.update_many(
+                bulk_data.attendance_ids, update_dict, updated_by_id=current_user_id
+            )
+            self._commit()
+            
+            updated = set(updated_ids)
+            return AttendanceBulkResponse(
+                processed_ids=updated_ids,
+                skipped_ids=[aid for aid in bulk_data.attendance_ids if aid not in updated]
+            )
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception(f"Error bulk updating attendance: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    
     def delete_attendance(self, attendance_id: int, request) -> Dict[str, str]:
         """Delete attendance record."""
         logger.warning(f"Deleting attendance: {attendance_id}")
@@ -261,18 +363,10 @@ class AttendanceService:
         try:
             current_user_id = self.get_current_user_id(request)
             
-            # Get record
-            record = self.attendance_repo.get_by_id(attendance_id)
-            if not record:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Attendance record not found"
-                )
-            
-            # Verify admin access for deletion
-            self.verify_admin_access(current_user_id)
+            # Deleting attendance needs edit rights
+            self.verify_permission(current_user_id, "attendance.edit")
             
-            # Delete record
+            # Delete record; a missing record is reported by the repository
             success = self.attendance_repo.delete(attendance_id)
             if not success:
                 raise HTTPException(
@@ -280,6 +374,7 @@ class AttendanceService:
                     detail="Attendance record not found"
                 )
             
+            self._commit()
             return {"message": "Attendance record deleted successfully"}
             
         except HTTPException:
@@ -298,9 +393,9 @@ class AttendanceService:
         try:
             current_user_id = self.get_current_user_id(request)
             
-            # Verify access (user can apply for their own leave, admin can apply for others)
+            # Users apply for their own leave; applying for others needs edit rights
             if leave_data.employee_id != current_user_id:
-                self.verify_admin_access(current_user_id)
+                self.verify_permission(current_user_id, "attendance.edit")
             
             # Apply leave
             record = self.attendance_repo.apply_leave(
@@ -311,9 +406,10 @@ class AttendanceService:
                 reason=leave_data.reason,
                 comment_json=leave_data.comment_json
             )
+            self._commit()
             
             # Return response
-            return self.get_attendance(record.attendance_id, request)
+            return self._load_response(record.attendance_id)
             
         except ValueError as e:
             raise HTTPException(
@@ -336,8 +432,16 @@ class AttendanceService:
         try:
             current_user_id = self.get_current_user_id(request)
             
-            # Verify admin access for leave approval
-            self.verify_admin_access(current_user_id)
+            from .repositories import LeaveStatusEnum
+            status_enum = LeaveStatusEnum(leave_action.action.value)
+            if status_enum == LeaveStatusEnum.PENDING:
+                raise ValueError("Leave action must be approved or rejected")
+            
+            # Approver permission for the requested action
+            self.verify_permission(
+                current_user_id,
+                "leave.approve" if status_enum == LeaveStatusEnum.APPROVED else "leave.reject"
+            )
             
             # Get record
             record = self.attendance_repo.get_by_id(leave_action.attendance_id)
@@ -347,19 +451,24 @@ class AttendanceService:
                     detail="Attendance record not found"
                 )
             
-            # Process leave action
-            from .repositories import LeaveStatusEnum
-            status_enum = LeaveStatusEnum(leave_action.action.value)
+            # Approvers cannot act on their own leave
+            if record.employee_id == current_user_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Cannot approve or reject your own leave"
+                )
             
+            # Process leave action
             record = self.attendance_repo.process_leave_action(
                 attendance_id=leave_action.attendance_id,
                 action=status_enum,
                 approved_by_id=current_user_id,
                 comments=leave_action.comments
             )
+            self._commit()
             
             # Return response
-            return self.get_attendance(record.attendance_id, request)
+            return self._load_response(record.attendance_id)
             
         except ValueError as e:
             raise HTTPException(
@@ -375,6 +484,52 @@ class AttendanceService:
                 detail="Internal server error"
             )
     
+    def process_leave_action_many(self, leave_action: LeaveBulkActionRequest, request) -> LeaveBulkActionResponse:
+        """Approve or reject many leave requests."""
+        logger.info(f"Processing leave action {leave_action.action} for {len(leave_action.attendance_ids)} attendance records")
+        
+        try:
+            current_user_id = self.get_current_user_id(request)
+            
+            from .repositories import LeaveStatusEnum
+            status_enum = LeaveStatusEnum(leave_action.action.value)
+            if status_enum == LeaveStatusEnum.PENDING:
+                raise ValueError("Leave action must be approved or rejected")
+            
+            # Approver permission for the requested action
+            self.verify_permission(
+                current_user_id,
+                "leave.approve" if status_enum == LeaveStatusEnum.APPROVED else "leave.reject"
+            )
+            
+            processed_ids = self.attendance_repo.process_leave_action_many(
+                attendance_ids=leave_action.attendance_ids,
+                action=status_enum,
+                approved_by_id=current_user_id,
+                comments=leave_action.comments
+            )
+            self._commit()
+            
+            processed = set(processed_ids)
+            return LeaveBulkActionResponse(
+                processed_ids=processed_ids,
+                skipped_ids=[aid for aid in leave_action.attendance_ids if aid not in processed]
+            )
+            
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.exception(f"Error processing bulk leave action: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    
     def check_in(self, check_in_data: CheckInRequest, request) -> EmployeeAvailabilityResponse:
         """Record employee check-in."""
         logger.info(f"Recording check-in for employee {check_in_data.employee_id}")
@@ -382,9 +537,9 @@ class AttendanceService:
         try:
             current_user_id = self.get_current_user_id(request)
             
-            # Verify access
+            # Checking in someone else needs edit rights
             if check_in_data.employee_id != current_user_id:
-                self.verify_admin_access(current_user_id)
+                self.verify_permission(current_user_id, "attendance.edit")
             
             # Record check-in
             record = self.attendance_repo.check_in(
@@ -394,9 +549,10 @@ class AttendanceService:
                 updated_by_id=current_user_id,
                 comment_json=check_in_data.comment_json
             )
+            self._commit()
             
             # Return response
-            return self.get_attendance(record.attendance_id, request)
+            return self._load_response(record.attendance_id)
             
         except ValueError as e:
             raise HTTPException(
@@ -419,9 +575,9 @@ class AttendanceService:
         try:
             current_user_id = self.get_current_user_id(request)
             
-            # Verify access
+            # Checking out someone else needs edit rights
             if check_out_data.employee_id != current_user_id:
-                self.verify_admin_access(current_user_id)
+                self.verify_permission(current_user_id, "attendance.edit")
             
             # Record check-out
             record = self.attendance_repo.check_out(
@@ -431,9 +587,10 @@ class AttendanceService:
                 updated_by_id=current_user_id,
                 comment_json=check_out_data.comment_json
             )
+            self._commit()
             
             # Return response
-            return self.get_attendance(record.attendance_id, request)
+            return self._load_response(record.attendance_id)
             
         except ValueError as e:
             raise HTTPException(
@@ -484,11 +641,10 @@ class AttendanceService:
             self.verify_employee_access(current_user_id, employee_id)
             
             # Get today's record
-            today = date.today()
-            record = self.attendance_repo.get_by_employee_date(employee_id, today)
+            record = self.attendance_repo.get_record_by_employee_date(employee_id, date.today())
             
             if record:
-                return self.get_attendance(record.attendance_id, request)
+                return EmployeeAvailabilityResponse.from_record(record, self._related_names(record))
             return None
             
         except HTTPException:
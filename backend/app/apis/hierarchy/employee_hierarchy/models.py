@@ -1,5 +1,5 @@
 import logging
-from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, BigInteger, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.base import Base
@@ -12,27 +12,42 @@ class EmployeeHierarchy(Base):
     
     __tablename__ = "employee_hierarchy"
     
-    id = Column(BigInteger, primary_key=True, index=True)
-    user_id = Column(BigInteger, ForeignKey('users.user_id'), nullable=False, index=True)
-    reporting_to_id = Column(BigInteger, ForeignKey('users.user_id'), index=True)
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(BigInteger, ForeignKey('users.user_id'), nullable=False)
+    reporting_to_id = Column(BigInteger, ForeignKey('users.user_id'))
     depth = Column(Integer, nullable=False, default=0)
     updated_by = Column(BigInteger, ForeignKey('users.user_id'), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Entries form a closure table (one row per ancestor, with its depth), so
+    # a manager's whole subtree is a single reporting_to_id lookup; depth and
+    # user_id ride along to serve it ordered from the index. The unique
+    # (user_id, depth, reporting_to_id) index keeps one row per ancestor and
+    # serves a user's entries ordered by depth.
+    __table_args__ = (
+        Index('ix_employee_hierarchy_reporting_depth', 'reporting_to_id', 'depth', 'user_id'),
+        Index('uq_employee_hierarchy_user_depth_manager', 'user_id', 'depth', 'reporting_to_id', unique=True),
+    )
+    
     # Relationships
+    # lazy="raise": callers must opt in through the repository's `load`
+    # argument so list endpoints never fall into per-row lazy loads (N+1)
     employee = relationship(
         "ExistingUser", 
         foreign_keys=[user_id],
-        backref="hierarchy_entries"
+        backref="hierarchy_entries",
+        lazy="raise"
     )
     reporting_to = relationship(
         "ExistingUser", 
         foreign_keys=[reporting_to_id],
-        backref="subordinates"
+        backref="subordinates",
+        lazy="raise"
     )
     updater = relationship(
         "ExistingUser", 
-        foreign_keys=[updated_by]
+        foreign_keys=[updated_by],
+        lazy="raise"
     )
     
     def __repr__(self):
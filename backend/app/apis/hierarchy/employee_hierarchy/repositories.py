@@ -1,788 +1,232 @@
-# import logging
-# from typing import Optional, List, Dict, Any
-# from sqlalchemy.orm import Session, aliased
-# from sqlalchemy import func, and_, or_
-# from .models import EmployeeHierarchy
+import logging
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import func, and_, or_, select, insert, tuple_, bindparam, Row
+from app.apis.auth.models import ExistingUser
+from .models import EmployeeHierarchy
 
-# logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
 
 
-# class EmployeeHierarchyRepository:
-#     """Repository for Employee Hierarchy database operations."""
-    
-#     def __init__(self, db: Session):
-#         self.db = db
-    
-#     def get_by_user_id(self, user_id: int) -> Optional[EmployeeHierarchy]:
-#         """Get FIRST hierarchy entry by user ID."""
-#         try:
-#             return self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id
-#             ).first()
-#         except Exception as e:
-#             logger.error(f"Error fetching hierarchy for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_all_by_user_id(self, user_id: int) -> List[EmployeeHierarchy]:
-#         """Get ALL hierarchy entries for a user (multiple entries possible)."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id
-#             ).order_by(EmployeeHierarchy.depth).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching all hierarchy for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_reporting_chain_entries(self, user_id: int) -> List[EmployeeHierarchy]:
-#         """Get all hierarchy entries in the reporting chain for a user."""
-#         try:
-#             # Get the starting entry
-#             start_entry = self.get_by_user_id(user_id)
-#             if not start_entry:
-#                 return []
-            
-#             # Collect all entries in the chain using loop
-#             chain = [start_entry]
-#             current_user_id = start_entry.reporting_to_id
-            
-#             while current_user_id:
-#                 next_entry = self.get_by_user_id(current_user_id)
-#                 if not next_entry:
-#                     break
-#                 chain.append(next_entry)
-#                 current_user_id = next_entry.reporting_to_id
-            
-#             return chain
-#         except Exception as e:
-#             logger.error(f"Error fetching reporting chain for user {user_id}: {str(e)}")
-#             raise
-    
-#     def create_entry(self, user_id: int, reporting_to_id: Optional[int], depth: int, updated_by: int) -> EmployeeHierarchy:
-#         """Create a single hierarchy entry."""
-#         try:
-#             # Check if same entry already exists
-#             existing = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id,
-#                 EmployeeHierarchy.reporting_to_id == reporting_to_id,
-#                 EmployeeHierarchy.depth == depth
-#             ).first()
-            
-#             if existing:
-#                 return existing
-            
-#             entry = EmployeeHierarchy(
-#                 user_id=user_id,
-#                 reporting_to_id=reporting_to_id,
-#                 depth=depth,
-#                 updated_by=updated_by
-#             )
-            
-#             self.db.add(entry)
-#             self.db.commit()
-#             self.db.refresh(entry)
-            
-#             logger.info(f"Created hierarchy entry: user {user_id} reports to {reporting_to_id} at depth {depth}")
-#             return entry
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error creating hierarchy entry: {str(e)}")
-#             raise
-    
-#     def create_complete_reporting_chain(self, user_id: int, first_reporting_to_id: Optional[int], updated_by: int) -> List[EmployeeHierarchy]:
-#         """
-#         Create complete reporting chain for a new user.
-        
-#         Example: If user1 reports to user2, and user2 reports to user3,
-#         this will create entries for:
-#         - user1 reports to user2 (depth 1)
-#         - user1 reports to user3 (depth 2)
-#         - user1 reports to user4 (depth 3) ... up to the top
-#         """
-#         try:
-#             entries_created = []
-            
-#             if first_reporting_to_id:
-#                 # Step 1: Get the reporting chain of the first manager
-#                 manager_chain = self.get_reporting_chain_entries(first_reporting_to_id)
-                
-#                 if not manager_chain:
-#                     raise ValueError(f"Manager {first_reporting_to_id} not found in hierarchy")
-                
-#                 # Step 2: Create entry for direct report (depth 1)
-#                 direct_entry = self.create_entry(
-#                     user_id=user_id,
-#                     reporting_to_id=first_reporting_to_id,
-#                     depth=1,
-#                     updated_by=updated_by
-#                 )
-#                 entries_created.append(direct_entry)
-                
-#                 # Step 3: Create entries for all managers in the chain (indirect reports)
-#                 for i, manager_entry in enumerate(manager_chain, start=2):
-#                     indirect_entry = self.create_entry(
-#                         user_id=user_id,
-#                         reporting_to_id=manager_entry.user_id,
-#                         depth=i,
-#                         updated_by=updated_by
-#                     )
-#                     entries_created.append(indirect_entry)
-#             else:
-#                 # User has no manager (top-level)
-#                 top_entry = self.create_entry(
-#                     user_id=user_id,
-#                     reporting_to_id=None,
-#                     depth=0,
-#                     updated_by=updated_by
-#                 )
-#                 entries_created.append(top_entry)
-            
-#             self.db.commit()
-#             logger.info(f"Created {len(entries_created)} hierarchy entries for user {user_id}")
-#             return entries_created
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error creating complete reporting chain: {str(e)}")
-#             raise
-    
-#     def delete_by_user_id(self, user_id: int) -> bool:
-#         """Delete ALL hierarchy entries for a user."""
-#         try:
-#             entries = self.get_all_by_user_id(user_id)
-#             if not entries:
-#                 return False
-            
-#             for entry in entries:
-#                 self.db.delete(entry)
-            
-#             self.db.commit()
-#             logger.info(f"Deleted {len(entries)} hierarchy entries for user {user_id}")
-#             return True
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error deleting hierarchy entries for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_all(self, skip: int = 0, limit: int = 100) -> List[EmployeeHierarchy]:
-#         """Get all hierarchy entries with pagination."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).order_by(
-#                 EmployeeHierarchy.user_id,
-#                 EmployeeHierarchy.depth
-#             ).offset(skip).limit(limit).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching all hierarchy entries: {str(e)}")
-#             raise
-    
-#     def get_count(self) -> int:
-#         """Get total hierarchy entry count."""
-#         try:
-#             count = self.db.query(func.count(EmployeeHierarchy.id)).scalar()
-#             return count
-#         except Exception as e:
-#             logger.error(f"Error getting hierarchy count: {str(e)}")
-#             raise
-    
-#     def get_users_by_manager(self, manager_id: int) -> List[EmployeeHierarchy]:
-#         """Get all users who report to a specific manager."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.reporting_to_id == manager_id
-#             ).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching users by manager {manager_id}: {str(e)}")
-#             raiseimport logging
-# from typing import Optional, List, Dict, Any
-# from sqlalchemy.orm import Session, aliased
-# from sqlalchemy import func, and_, or_
-# from .models import EmployeeHierarchy
+# Relationships backing the *_name fields of hierarchy responses
+NAMED_RELATIONSHIPS = ('employee', 'reporting_to', 'updater')
 
-# logger = logging.getLogger(__name__)
 
+def _load_options(load: Sequence[str]) -> list:
+    """Joined eager loads for the named relationships (all many-to-one)."""
+    return [joinedload(getattr(EmployeeHierarchy, name)) for name in load]
 
-# class EmployeeHierarchyRepository:
-#     """Repository for Employee Hierarchy database operations."""
-    
-#     def __init__(self, db: Session):
-#         self.db = db
-    
-#     def get_by_user_id(self, user_id: int) -> Optional[EmployeeHierarchy]:
-#         """Get FIRST hierarchy entry by user ID."""
-#         try:
-#             return self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id
-#             ).first()
-#         except Exception as e:
-#             logger.error(f"Error fetching hierarchy for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_all_by_user_id(self, user_id: int) -> List[EmployeeHierarchy]:
-#         """Get ALL hierarchy entries for a user (multiple entries possible)."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id
-#             ).order_by(EmployeeHierarchy.depth).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching all hierarchy for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_reporting_chain_entries(self, user_id: int) -> List[EmployeeHierarchy]:
-#         """Get all hierarchy entries in the reporting chain for a user."""
-#         try:
-#             # Get the starting entry
-#             start_entry = self.get_by_user_id(user_id)
-#             if not start_entry:
-#                 return []
-            
-#             # Collect all entries in the chain using loop
-#             chain = [start_entry]
-#             current_user_id = start_entry.reporting_to_id
-            
-#             while current_user_id:
-#                 next_entry = self.get_by_user_id(current_user_id)
-#                 if not next_entry:
-#                     break
-#                 chain.append(next_entry)
-#                 current_user_id = next_entry.reporting_to_id
-            
-#             return chain
-#         except Exception as e:
-#             logger.error(f"Error fetching reporting chain for user {user_id}: {str(e)}")
-#             raise
-    
-#     def create_entry(self, user_id: int, reporting_to_id: Optional[int], depth: int, updated_by: int) -> EmployeeHierarchy:
-#         """Create a single hierarchy entry."""
-#         try:
-#             # Check if same entry already exists
-#             existing = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id,
-#                 EmployeeHierarchy.reporting_to_id == reporting_to_id,
-#                 EmployeeHierarchy.depth == depth
-#             ).first()
-            
-#             if existing:
-#                 return existing
-            
-#             entry = EmployeeHierarchy(
-#                 user_id=user_id,
-#                 reporting_to_id=reporting_to_id,
-#                 depth=depth,
-#                 updated_by=updated_by
-#             )
-            
-#             self.db.add(entry)
-#             self.db.commit()
-#             self.db.refresh(entry)
-            
-#             logger.info(f"Created hierarchy entry: user {user_id} reports to {reporting_to_id} at depth {depth}")
-#             return entry
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error creating hierarchy entry: {str(e)}")
-#             raise
-    
-#     def create_complete_reporting_chain(self, user_id: int, first_reporting_to_id: Optional[int], updated_by: int) -> List[EmployeeHierarchy]:
-#         """
-#         Create complete reporting chain for a new user.
-        
-#         Example: If user1 reports to user2, and user2 reports to user3,
-#         this will create entries for:
-#         - user1 reports to user2 (depth 1)
-#         - user1 reports to user3 (depth 2)
-#         - user1 reports to user4 (depth 3) ... up to the top
-#         """
-#         try:
-#             entries_created = []
-            
-#             if first_reporting_to_id:
-#                 # Step 1: Get the reporting chain of the first manager
-#                 manager_chain = self.get_reporting_chain_entries(first_reporting_to_id)
-                
-#                 if not manager_chain:
-#                     raise ValueError(f"Manager {first_reporting_to_id} not found in hierarchy")
-                
-#                 # Step 2: Create entry for direct report (depth 1)
-#                 direct_entry = self.create_entry(
-#                     user_id=user_id,
-#                     reporting_to_id=first_reporting_to_id,
-#                     depth=1,
-#                     updated_by=updated_by
-#                 )
-#                 entries_created.append(direct_entry)
-                
-#                 # Step 3: Create entries for all managers in the chain (indirect reports)
-#                 for i, manager_entry in enumerate(manager_chain, start=2):
-#                     indirect_entry = self.create_entry(
-#                         user_id=user_id,
-#                         reporting_to_id=manager_entry.user_id,
-#                         depth=i,
-#                         updated_by=updated_by
-#                     )
-#                     entries_created.append(indirect_entry)
-#             else:
-#                 # User has no manager (top-level)
-#                 top_entry = self.create_entry(
-#                     user_id=user_id,
-#                     reporting_to_id=None,
-#                     depth=0,
-#                     updated_by=updated_by
-#                 )
-#                 entries_created.append(top_entry)
-            
-#             self.db.commit()
-#             logger.info(f"Created {len(entries_created)} hierarchy entries for user {user_id}")
-#             return entries_created
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error creating complete reporting chain: {str(e)}")
-#             raise
-    
-#     def delete_by_user_id(self, user_id: int) -> bool:
-#         """Delete ALL hierarchy entries for a user."""
-#         try:
-#             entries = self.get_all_by_user_id(user_id)
-#             if not entries:
-#                 return False
-            
-#             for entry in entries:
-#                 self.db.delete(entry)
-            
-#             self.db.commit()
-#             logger.info(f"Deleted {len(entries)} hierarchy entries for user {user_id}")
-#             return True
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error deleting hierarchy entries for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_all(self, skip: int = 0, limit: int = 100) -> List[EmployeeHierarchy]:
-#         """Get all hierarchy entries with pagination."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).order_by(
-#                 EmployeeHierarchy.user_id,
-#                 EmployeeHierarchy.depth
-#             ).offset(skip).limit(limit).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching all hierarchy entries: {str(e)}")
-#             raise
-    
-#     def get_count(self) -> int:
-#         """Get total hierarchy entry count."""
-#         try:
-#             count = self.db.query(func.count(EmployeeHierarchy.id)).scalar()
-#             return count
-#         except Exception as e:
-#             logger.error(f"Error getting hierarchy count: {str(e)}")
-#             raise
-    
-#     def get_users_by_manager(self, manager_id: int) -> List[EmployeeHierarchy]:
-#         """Get all users who report to a specific manager."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.reporting_to_id == manager_id
-#             ).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching users by manager {manager_id}: {str(e)}")
-#             raiseimport logging
-# from typing import Optional, List, Dict, Any
-# from sqlalchemy.orm import Session, aliased
-# from sqlalchemy import func, and_, or_
-# from .models import EmployeeHierarchy
 
-# logger = logging.getLogger(__name__)
+def _response_rows():
+    """SELECT of the response columns with the three user names joined in (Core rows, no ORM entities)."""
+    employee = aliased(ExistingUser)
+    manager = aliased(ExistingUser)
+    updater = aliased(ExistingUser)
+    return select(
+        EmployeeHierarchy.id,
+        EmployeeHierarchy.user_id,
+        EmployeeHierarchy.reporting_to_id,
+        EmployeeHierarchy.depth,
+        EmployeeHierarchy.updated_by,
+        EmployeeHierarchy.updated_at,
+        employee.full_name.label('employee_name'),
+        manager.full_name.label('reporting_to_name'),
+        updater.full_name.label('updated_by_name')
+    ).outerjoin(
+        employee, employee.user_id == EmployeeHierarchy.user_id
+    ).outerjoin(
+        manager, manager.user_id == EmployeeHierarchy.reporting_to_id
+    ).outerjoin(
+        updater, updater.user_id == EmployeeHierarchy.updated_by
+    )
 
 
-# class EmployeeHierarchyRepository:
-#     """Repository for Employee Hierarchy database operations."""
-    
-#     def __init__(self, db: Session):
-#         self.db = db
-    
-#     def get_by_user_id(self, user_id: int) -> Optional[EmployeeHierarchy]:
-#         """Get FIRST hierarchy entry by user ID."""
-#         try:
-#             return self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id
-#             ).first()
-#         except Exception as e:
-#             logger.error(f"Error fetching hierarchy for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_all_by_user_id(self, user_id: int) -> List[EmployeeHierarchy]:
-#         """Get ALL hierarchy entries for a user (multiple entries possible)."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id
-#             ).order_by(EmployeeHierarchy.depth).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching all hierarchy for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_reporting_chain_entries(self, user_id: int) -> List[EmployeeHierarchy]:
-#         """Get all hierarchy entries in the reporting chain for a user."""
-#         try:
-#             # Get the starting entry
-#             start_entry = self.get_by_user_id(user_id)
-#             if not start_entry:
-#                 return []
-            
-#             # Collect all entries in the chain using loop
-#             chain = [start_entry]
-#             current_user_id = start_entry.reporting_to_id
-            
-#             while current_user_id:
-#                 next_entry = self.get_by_user_id(current_user_id)
-#                 if not next_entry:
-#                     break
-#                 chain.append(next_entry)
-#                 current_user_id = next_entry.reporting_to_id
-            
-#             return chain
-#         except Exception as e:
-#             logger.error(f"Error fetching reporting chain for user {user_id}: {str(e)}")
-#             raise
-    
-#     def create_entry(self, user_id: int, reporting_to_id: Optional[int], depth: int, updated_by: int) -> EmployeeHierarchy:
-#         """Create a single hierarchy entry."""
-#         try:
-#             # Check if same entry already exists
-#             existing = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.user_id == user_id,
-#                 EmployeeHierarchy.reporting_to_id == reporting_to_id,
-#                 EmployeeHierarchy.depth == depth
-#             ).first()
-            
-#             if existing:
-#                 return existing
-            
-#             entry = EmployeeHierarchy(
-#                 user_id=user_id,
-#                 reporting_to_id=reporting_to_id,
-#                 depth=depth,
-#                 updated_by=updated_by
-#             )
-            
-#             self.db.add(entry)
-#             self.db.commit()
-#             self.db.refresh(entry)
-            
-#             logger.info(f"Created hierarchy entry: user {user_id} reports to {reporting_to_id} at depth {depth}")
-#             return entry
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error creating hierarchy entry: {str(e)}")
-#             raise
-    
-#     def create_complete_reporting_chain(self, user_id: int, first_reporting_to_id: Optional[int], updated_by: int) -> List[EmployeeHierarchy]:
-#         """
-#         Create complete reporting chain for a new user.
-        
-#         Example: If user1 reports to user2, and user2 reports to user3,
-#         this will create entries for:
-#         - user1 reports to user2 (depth 1)
-#         - user1 reports to user3 (depth 2)
-#         - user1 reports to user4 (depth 3) ... up to the top
-#         """
-#         try:
-#             entries_created = []
-            
-#             if first_reporting_to_id:
-#                 # Step 1: Get the reporting chain of the first manager
-#                 manager_chain = self.get_reporting_chain_entries(first_reporting_to_id)
-                
-#                 if not manager_chain:
-#                     raise ValueError(f"Manager {first_reporting_to_id} not found in hierarchy")
-                
-#                 # Step 2: Create entry for direct report (depth 1)
-#                 direct_entry = self.create_entry(
-#                     user_id=user_id,
-#                     reporting_to_id=first_reporting_to_id,
-#                     depth=1,
-#                     updated_by=updated_by
-#                 )
-#                 entries_created.append(direct_entry)
-                
-#                 # Step 3: Create entries for all managers in the chain (indirect reports)
-#                 for i, manager_entry in enumerate(manager_chain, start=2):
-#                     indirect_entry = self.create_entry(
-#                         user_id=user_id,
-#                         reporting_to_id=manager_entry.user_id,
-#                         depth=i,
-#                         updated_by=updated_by
-#                     )
-#                     entries_created.append(indirect_entry)
-#             else:
-#                 # User has no manager (top-level)
-#                 top_entry = self.create_entry(
-#                     user_id=user_id,
-#                     reporting_to_id=None,
-#                     depth=0,
-#                     updated_by=updated_by
-#                 )
-#                 entries_created.append(top_entry)
-            
-#             self.db.commit()
-#             logger.info(f"Created {len(entries_created)} hierarchy entries for user {user_id}")
-#             return entries_created
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error creating complete reporting chain: {str(e)}")
-#             raise
-    
-#     def delete_by_user_id(self, user_id: int) -> bool:
-#         """Delete ALL hierarchy entries for a user."""
-#         try:
-#             entries = self.get_all_by_user_id(user_id)
-#             if not entries:
-#                 return False
-            
-#             for entry in entries:
-#                 self.db.delete(entry)
-            
-#             self.db.commit()
-#             logger.info(f"Deleted {len(entries)} hierarchy entries for user {user_id}")
-#             return True
-            
-#         except Exception as e:
-#             self.db.rollback()
-#             logger.error(f"Error deleting hierarchy entries for user {user_id}: {str(e)}")
-#             raise
-    
-#     def get_all(self, skip: int = 0, limit: int = 100) -> List[EmployeeHierarchy]:
-#         """Get all hierarchy entries with pagination."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).order_by(
-#                 EmployeeHierarchy.user_id,
-#                 EmployeeHierarchy.depth
-#             ).offset(skip).limit(limit).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching all hierarchy entries: {str(e)}")
-#             raise
-    
-#     def get_count(self) -> int:
-#         """Get total hierarchy entry count."""
-#         try:
-#             count = self.db.query(func.count(EmployeeHierarchy.id)).scalar()
-#             return count
-#         except Exception as e:
-#             logger.error(f"Error getting hierarchy count: {str(e)}")
-#             raise
-    
-#     def get_users_by_manager(self, manager_id: int) -> List[EmployeeHierarchy]:
-#         """Get all users who report to a specific manager."""
-#         try:
-#             entries = self.db.query(EmployeeHierarchy).filter(
-#                 EmployeeHierarchy.reporting_to_id == manager_id
-#             ).all()
-#             return entries
-#         except Exception as e:
-#             logger.error(f"Error fetching users by manager {manager_id}: {str(e)}")
-#             raise
+# Statements of the per-request read paths, built once at import and
+# executed with bound parameters (SQL compilation is cached by the engine;
+# this also skips rebuilding the expression tree on every call)
+_ALL_BY_USER = select(EmployeeHierarchy).where(
+    EmployeeHierarchy.user_id == bindparam('user_id')
+).order_by(EmployeeHierarchy.depth)
 
-import logging
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session, aliased
-from sqlalchemy import func, and_, or_
-from .models import EmployeeHierarchy
+_HAS_ENTRIES = select(EmployeeHierarchy.id).where(
+    EmployeeHierarchy.user_id == bindparam('user_id')
+).limit(1)
 
-logger = logging.getLogger(__name__)
+_ROWS_BY_MANAGER = _response_rows().where(
+    EmployeeHierarchy.reporting_to_id == bindparam('manager_id')
+).order_by(EmployeeHierarchy.depth, EmployeeHierarchy.user_id)
+
+_ROWS_ORDERED = _response_rows().order_by(
+    EmployeeHierarchy.user_id,
+    EmployeeHierarchy.depth,
+    EmployeeHierarchy.id
+)
+
+# Page and total in one round-trip: count(*) OVER () is evaluated
+# before LIMIT/OFFSET
+_ROWS_PAGE = _ROWS_ORDERED.add_columns(
+    func.count().over().label('total')
+).offset(bindparam('skip')).limit(bindparam('limit'))
+
+_ROWS_AFTER = _ROWS_ORDERED.where(
+    tuple_(EmployeeHierarchy.user_id, EmployeeHierarchy.depth, EmployeeHierarchy.id) >
+    tuple_(bindparam('after_user_id'), bindparam('after_depth'), bindparam('after_id'))
+).limit(bindparam('limit'))
 
 
 class EmployeeHierarchyRepository:
-    """Repository for Employee Hierarchy database operations."""
+    """
+    Repository for Employee Hierarchy database operations.
+    
+    Relationships are lazy="raise". Read methods that feed responses take
+    a `load` tuple of relationship names (e.g. NAMED_RELATIONSHIPS) which
+    are eager-loaded in the same query.
+    """
     
     def __init__(self, db: Session):
         self.db = db
     
-    def get_by_user_id(self, user_id: int) -> Optional[EmployeeHierarchy]:
-        """Get FIRST hierarchy entry by user ID."""
-        try:
-            return self.db.query(EmployeeHierarchy).filter(
-                EmployeeHierarchy.user_id == user_id
-            ).first()
-        except Exception as e:
-            logger.error(f"Error fetching hierarchy for user {user_id}: {str(e)}")
-            raise
-    
-    def get_all_by_user_id(self, user_id: int) -> List[EmployeeHierarchy]:
+    def get_all_by_user_id(self, user_id: int, load: Sequence[str] = ()) -> List[EmployeeHierarchy]:
         """Get ALL hierarchy entries for a user (multiple entries possible)."""
         try:
-            entries = self.db.query(EmployeeHierarchy).filter(
-                EmployeeHierarchy.user_id == user_id
-            ).order_by(EmployeeHierarchy.depth).all()
-            return entries
+            return self.db.scalars(
+                _ALL_BY_USER.options(*_load_options(load)) if load else _ALL_BY_USER,
+                {'user_id': user_id}
+            ).all()
         except Exception as e:
-            logger.error(f"Error fetching all hierarchy for user {user_id}: {str(e)}")
+            logger.error("Error fetching all hierarchy for user %s: %s", user_id, e)
             raise
     
-    def get_reporting_chain_entries(self, user_id: int) -> List[EmployeeHierarchy]:
-        """Get all hierarchy entries in the reporting chain for a user."""
+    def has_entries(self, user_id: int) -> bool:
+        """Check whether a user has any hierarchy entry (SELECT id ... LIMIT 1, no entity load)."""
         try:
-            # Get the starting entry
-            start_entry = self.get_by_user_id(user_id)
-            if not start_entry:
-                return []
-            
-            # Collect all entries in the chain using loop
-            chain = [start_entry]
-            current_user_id = start_entry.reporting_to_id
-            
-            while current_user_id:
-                next_entry = self.get_by_user_id(current_user_id)
-                if not next_entry:
-                    break
-                chain.append(next_entry)
-                current_user_id = next_entry.reporting_to_id
-            
-            return chain
+            return self.db.execute(_HAS_ENTRIES, {'user_id': user_id}).first() is not None
         except Exception as e:
-            logger.error(f"Error fetching reporting chain for user {user_id}: {str(e)}")
+            logger.error("Error checking hierarchy entries for user %s: %s", user_id, e)
             raise
     
-    def create_entry(self, user_id: int, reporting_to_id: Optional[int], depth: int, updated_by: int) -> EmployeeHierarchy:
-        """Create a single hierarchy entry."""
-        try:
-            # Check if same entry already exists
-            existing = self.db.query(EmployeeHierarchy).filter(
-                EmployeeHierarchy.user_id == user_id,
-                EmployeeHierarchy.reporting_to_id == reporting_to_id,
-                EmployeeHierarchy.depth == depth
-            ).first()
-            
-            if existing:
-                return existing
-            
-            entry = EmployeeHierarchy(
-                user_id=user_id,
-                reporting_to_id=reporting_to_id,
-                depth=depth,
-                updated_by=updated_by
-            )
-            
-            self.db.add(entry)
-            self.db.commit()
-            self.db.refresh(entry)
-            
-            logger.info(f"Created hierarchy entry: user {user_id} reports to {reporting_to_id} at depth {depth}")
-            return entry
-            
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error creating hierarchy entry: {str(e)}")
-            raise
-        
     def create_complete_reporting_chain(self, user_id: int, first_reporting_to_id: Optional[int], updated_by: int) -> List[EmployeeHierarchy]:
         """
         Create complete reporting chain for a new user.
         
         Copies the entire reporting chain of the first_reportee_id,
-        but increases all depths by 1 for the new user.
+        but increases all depths by 1 for the new user. Entries the user
+        already has are kept; the missing ones are written in a single
+        multi-row INSERT and one commit.
         """
         try:
-            entries_created = []
+            # The user's own entries and the first reportee's, in one query
+            user_ids = [user_id, first_reporting_to_id] if first_reporting_to_id else [user_id]
+            entries = self.db.query(EmployeeHierarchy).filter(
+                EmployeeHierarchy.user_id.in_(user_ids)
+            ).order_by(EmployeeHierarchy.depth).all()
+            existing = {
+                (entry.reporting_to_id, entry.depth): entry
+                for entry in entries if entry.user_id == user_id
+            }
             
             if first_reporting_to_id:
                 # Step 1: Get ALL reporting entries of the first reportee
-                reportee_entries = self.get_all_by_user_id(first_reporting_to_id)
+                reportee_entries = [entry for entry in entries if entry.user_id == first_reporting_to_id]
                 
                 if not reportee_entries:
                     raise ValueError(f"No hierarchy entries found for user {first_reporting_to_id}")
                 
-                # Step 2: Create entries for the new user based on reportee's chain
-                for reportee_entry in reportee_entries:
-                    # For direct report (reportee_entry.reporting_to_id is None means top-level)
-                    if reportee_entry.reporting_to_id is None:
-                        # This should not happen if first_reportee_id reports to someone
-                        continue
-                    
-                    # Calculate new depth: reportee's depth + 1
-                    new_depth = reportee_entry.depth + 1
-                    
-                    # Create entry
-                    new_entry = self.create_entry(
-                        user_id=user_id,
-                        reporting_to_id=reportee_entry.reporting_to_id,
-                        depth=new_depth,
-                        updated_by=updated_by
-                    )
-                    entries_created.append(new_entry)
-                
-                # Step 3: Also create the direct reporting entry (user → first_reportee_id)
-                # This is depth 1 (the reportee itself, not who they report to)
-                direct_entry = self.create_entry(
-                    user_id=user_id,
-                    reporting_to_id=first_reporting_to_id,
-                    depth=1,
-                    updated_by=updated_by
-                )
-                entries_created.append(direct_entry)
-                
-                # Step 4: Sort entries by depth for clarity
-                entries_created.sort(key=lambda x: x.depth)
+                # Step 2: The reportee's managers, one level further away
+                # (a top-level reportee has no manager entry to copy)
+                chain_keys = [
+                    (reportee_entry.reporting_to_id, reportee_entry.depth + 1)
+                    for reportee_entry in reportee_entries
+                    if reportee_entry.reporting_to_id is not None
+                ]
                 
+                # Step 3: Also the direct reporting entry (user → first_reportee_id)
+                chain_keys.append((first_reporting_to_id, 1))
             else:
                 # User has no manager (top-level)
-                top_entry = self.create_entry(
-                    user_id=user_id,
-                    reporting_to_id=None,
-                    depth=0,
-                    updated_by=updated_by
-                )
-                entries_created.append(top_entry)
+                chain_keys = [(None, 0)]
+            
+            missing = [
+                {
+                    'user_id': user_id,
+                    'reporting_to_id': reporting_to_id,
+                    'depth': depth,
+                    'updated_by': updated_by
+                }
+                for reporting_to_id, depth in chain_keys
+                if (reporting_to_id, depth) not in existing
+            ]
+            
+            entries_created = [existing[key] for key in chain_keys if key in existing]
+            if missing:
+                entries_created.extend(self.db.scalars(
+                    insert(EmployeeHierarchy).returning(EmployeeHierarchy),
+                    missing
+                ).all())
+            
+            # Step 4: Sort entries by depth for clarity
+            entries_created.sort(key=lambda x: x.depth)
             
             self.db.commit()
-            logger.info(f"Created {len(entries_created)} hierarchy entries for user {user_id}")
+            logger.info("Created %s hierarchy entries for user %s", len(missing), user_id)
             return entries_created
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error creating complete reporting chain: {str(e)}")
+            logger.error("Error creating complete reporting chain: %s", e)
             raise
     
     def delete_by_user_id(self, user_id: int) -> bool:
         """Delete ALL hierarchy entries for a user."""
         try:
-            entries = self.get_all_by_user_id(user_id)
-            if not entries:
-                return False
-            
-            for entry in entries:
-                self.db.delete(entry)
+            result = self.db.query(EmployeeHierarchy).filter(
+                EmployeeHierarchy.user_id == user_id
+            ).delete(synchronize_session=False)
             
             self.db.commit()
-            logger.info(f"Deleted {len(entries)} hierarchy entries for user {user_id}")
+            if not result:
+                return False
+            
+            logger.info("Deleted %s hierarchy entries for user %s", result, user_id)
             return True
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error deleting hierarchy entries for user {user_id}: {str(e)}")
+            logger.error("Error deleting hierarchy entries for user %s: %s", user_id, e)
             raise
     
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[EmployeeHierarchy]:
-        """Get all hierarchy entries with pagination."""
+    def get_all_rows(self, skip: int = 0, limit: int = 100,
+                     after: Optional[Tuple[int, int, int]] = None) -> Tuple[List[Row], Optional[int]]:
+        """
+        Get a page of hierarchy entries as rows with the user names joined in, and the total.
+        
+        With `after` (a (user_id, depth, id) cursor from the previous page)
+        the page is fetched by keyset instead of OFFSET and the total is
+        not computed (None).
+        """
         try:
-            entries = self.db.query(EmployeeHierarchy).order_by(
-                EmployeeHierarchy.user_id,
-                EmployeeHierarchy.depth
-            ).offset(skip).limit(limit).all()
-            return entries
+            if after is not None:
+                after_user_id, after_depth, after_id = after
+                rows = self.db.execute(_ROWS_AFTER, {
+                    'after_user_id': after_user_id,
+                    'after_depth': after_depth,
+                    'after_id': after_id,
+                    'limit': limit
+                }).all()
+                return rows, None
+            
+            rows = self.db.execute(_ROWS_PAGE, {'skip': skip, 'limit': limit}).all()
+            
+            if rows:
+                total = rows[0].total
+            elif skip:
+                # Page past the end: the window has no row to report on
+                total = self.get_count()
+            else:
+                total = 0
+            return rows, total
         except Exception as e:
-            logger.error(f"Error fetching all hierarchy entries: {str(e)}")
+            logger.error("Error fetching hierarchy rows: %s", e)
             raise
     
     def get_count(self) -> int:
@@ -791,16 +235,13 @@ class EmployeeHierarchyRepository:
             count = self.db.query(func.count(EmployeeHierarchy.id)).scalar()
             return count
         except Exception as e:
-            logger.error(f"Error getting hierarchy count: {str(e)}")
+            logger.error("Error getting hierarchy count: %s", e)
             raise
     
-    def get_users_by_manager(self, manager_id: int) -> List[EmployeeHierarchy]:
-        """Get all users who report to a specific manager."""
+    def get_users_by_manager_rows(self, manager_id: int) -> List[Row]:
+        """Get the users reporting to a manager as rows with the user names joined in."""
         try:
-            entries = self.db.query(EmployeeHierarchy).filter(
-                EmployeeHierarchy.reporting_to_id == manager_id
-            ).all()
-            return entries
+            return self.db.execute(_ROWS_BY_MANAGER, {'manager_id': manager_id}).all()
         except Exception as e:
-            logger.error(f"Error fetching users by manager {manager_id}: {str(e)}")
+            logger.error("Error fetching rows by manager %s: %s", manager_id, e)
             raise
\ No newline at end of file
@@ -1,5 +1,5 @@
 import logging
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, Request, Query, HTTPException
 from sqlalchemy.orm import Session
 
@@ -46,15 +46,18 @@ async def get_all_hierarchies(
     request: Request,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor (next_cursor of the previous page)"),
     hierarchy_service: EmployeeHierarchyService = Depends(get_hierarchy_service)
 ):
     """
     Get all hierarchy entries with pagination.
     
+    - **cursor**: Continue from a previous page's next_cursor (skips the total count)
+    
     Requires: hierarchy.view permission
     """
     logger.info("Get all hierarchies endpoint called")
-    return hierarchy_service.get_all_hierarchies(request, skip=skip, limit=limit)
+    return hierarchy_service.get_all_hierarchies(request, skip=skip, limit=limit, cursor=cursor)
 
 
 @router.get("/user/{user_id}", response_model=List[EmployeeHierarchyResponse])
@@ -71,7 +74,7 @@ async def get_hierarchy_entries_for_user(
     
     Requires: hierarchy.view permission
     """
-    logger.info(f"Get hierarchy entries for user endpoint called: {user_id}")
+    logger.info("Get hierarchy entries for user endpoint called: %s", user_id)
     return hierarchy_service.get_hierarchy_entries_for_user(user_id, request)
 
 
@@ -107,7 +110,7 @@ async def delete_all_hierarchy_entries(
     
     Requires: hierarchy.delete permission
     """
-    logger.info(f"Delete all hierarchy entries endpoint called for user: {user_id}")
+    logger.info("Delete all hierarchy entries endpoint called for user: %s", user_id)
     return hierarchy_service.delete_hierarchy_entries(user_id, request)
 
 
@@ -122,43 +125,27 @@ async def get_reportees_by_manager(
     
     Requires: hierarchy.view permission
     """
-    logger.info(f"Get reportees by manager endpoint called for manager: {manager_id}")
+    logger.info("Get reportees by manager endpoint called for manager: %s", manager_id)
     
     try:
         current_user_id = hierarchy_service.get_current_user_id(request)
         hierarchy_service.verify_permission(current_user_id, "hierarchy.view")
         
         # Get entries using repository
-        entries = hierarchy_service.hierarchy_repo.get_users_by_manager(manager_id)
+        rows = hierarchy_service.hierarchy_repo.get_users_by_manager_rows(manager_id)
         
-        if not entries:
+        if not rows:
             raise HTTPException(
                 status_code=404,
                 detail=f"No employees found reporting to manager: {manager_id}"
             )
         
-        # Prepare responses
-        responses = []
-        for entry in entries:
-            response_data = {
-                "id": entry.id,
-                "user_id": entry.user_id,
-                "reporting_to_id": entry.reporting_to_id,
-                "depth": entry.depth,
-                "updated_by": entry.updated_by,
-                "updated_at": entry.updated_at,
-                "employee_name": hierarchy_service._get_user_name(entry.user_id),
-                "reporting_to_name": hierarchy_service._get_user_name(entry.reporting_to_id) if entry.reporting_to_id else None,
-                "updated_by_name": hierarchy_service._get_user_name(entry.updated_by) if entry.updated_by else None
-            }
-            responses.append(EmployeeHierarchyResponse(**response_data))
-        
-        return responses
+        return [hierarchy_service.row_to_response(row) for row in rows]
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Error getting reportees by manager: {str(e)}")
+        logger.exception("Error getting reportees by manager: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error"
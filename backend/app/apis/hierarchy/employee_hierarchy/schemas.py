@@ -77,10 +77,11 @@ class OrganizationalChartResponse(BaseModel):
 
 class EmployeeHierarchyListResponse(BaseModel):
     entries: List[EmployeeHierarchyResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None for cursor pages
+    page: Optional[int] = None
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 
 class HierarchyCreationResponse(BaseModel):
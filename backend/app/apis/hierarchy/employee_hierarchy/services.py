@@ -1,12 +1,12 @@
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 # Add this import at the top with other imports
 from app.apis.auth.models import ExistingUser
 
 from app.core.base_service import BaseService
-from .repositories import EmployeeHierarchyRepository
+from .repositories import EmployeeHierarchyRepository, NAMED_RELATIONSHIPS
 from .schemas import (
     NewEmployeeHierarchyCreate,
     EmployeeHierarchyResponse,
@@ -17,6 +17,16 @@ from .schemas import (
 logger = logging.getLogger(__name__)
 
 
+def _user_name(full_name: Optional[str], user_id: int) -> str:
+    """Display name for a user, falling back to the ID."""
+    return full_name or f"User {user_id}"
+
+
+def _full_name(user: Optional[ExistingUser]) -> Optional[str]:
+    """Full name of a loaded user relationship, if any."""
+    return user.full_name if user else None
+
+
 class EmployeeHierarchyService(BaseService):
     """Service for employee hierarchy business logic."""
     
@@ -27,86 +37,89 @@ class EmployeeHierarchyService(BaseService):
     
     def get_hierarchy_entries_for_user(self, user_id: int, request) -> List[EmployeeHierarchyResponse]:
         """Get ALL hierarchy entries for a specific user."""
-        logger.debug(f"Getting all hierarchy entries for user: {user_id}")
+        logger.debug("Getting all hierarchy entries for user: %s", user_id)
         
         try:
             current_user_id = self.get_current_user_id(request)
             self.verify_permission(current_user_id, "hierarchy.view")
             
-            entries = self.hierarchy_repo.get_all_by_user_id(user_id)
+            entries = self.hierarchy_repo.get_all_by_user_id(user_id, load=NAMED_RELATIONSHIPS)
             if not entries:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"No hierarchy entries found for user: {user_id}"
                 )
             
-            responses = []
-            for entry in entries:
-                response_data = {
-                    "id": entry.id,
-                    "user_id": entry.user_id,
-                    "reporting_to_id": entry.reporting_to_id,
-                    "depth": entry.depth,
-                    "updated_by": entry.updated_by,
-                    "updated_at": entry.updated_at,
-                    "employee_name": self._get_user_name(entry.user_id),
-                    "reporting_to_name": self._get_user_name(entry.reporting_to_id) if entry.reporting_to_id else None,
-                    "updated_by_name": self._get_user_name(entry.updated_by) if entry.updated_by else None
-                }
-                responses.append(EmployeeHierarchyResponse(**response_data))
-            
-            return responses
+            return [self.to_response(entry) for entry in entries]
             
         except HTTPException:
             raise
         except Exception as e:
-            logger.exception(f"Error getting hierarchy entries for user {user_id}: {str(e)}")
+            logger.exception("Error getting hierarchy entries for user %s: %s", user_id, e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Internal server error"
             )
     
-    def get_all_hierarchies(self, request, skip: int = 0, limit: int = 100) -> EmployeeHierarchyListResponse:
-        """Get all hierarchy entries with pagination."""
-        logger.debug(f"Getting all hierarchy entries (skip: {skip}, limit: {limit})")
+    @staticmethod
+    def _encode_cursor(row) -> str:
+        """Keyset cursor for the row after which the next page starts."""
+        return f"{row.user_id}_{row.depth}_{row.id}"
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[int, int, int]:
+        """Parse a cursor produced by _encode_cursor."""
+        try:
+            user_id, depth, entry_id = cursor.split("_")
+            return int(user_id), int(depth), int(entry_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    def get_all_hierarchies(self, request, skip: int = 0, limit: int = 100,
+                            cursor: Optional[str] = None) -> EmployeeHierarchyListResponse:
+        """
+        Get all hierarchy entries with pagination.
+        
+        Offset pages (skip) carry totals; pages requested with a cursor are
+        fetched by keyset and omit total/page/total_pages.
+        """
+        logger.debug("Getting all hierarchy entries (skip: %s, limit: %s)", skip, limit)
         
         try:
             current_user_id = self.get_current_user_id(request)
             self.verify_permission(current_user_id, "hierarchy.view")
             
-            entries = self.hierarchy_repo.get_all(skip=skip, limit=limit)
-            total = self.hierarchy_repo.get_count()
-            
-            responses = []
-            for entry in entries:
-                response_data = {
-                    "id": entry.id,
-                    "user_id": entry.user_id,
-                    "reporting_to_id": entry.reporting_to_id,
-                    "depth": entry.depth,
-                    "updated_by": entry.updated_by,
-                    "updated_at": entry.updated_at,
-                    "employee_name": self._get_user_name(entry.user_id),
-                    "reporting_to_name": self._get_user_name(entry.reporting_to_id) if entry.reporting_to_id else None,
-                    "updated_by_name": self._get_user_name(entry.updated_by) if entry.updated_by else None
-                }
-                responses.append(EmployeeHierarchyResponse(**response_data))
-            
-            total_pages = (total + limit - 1) // limit if limit > 0 else 1
-            current_page = (skip // limit) + 1 if limit > 0 else 1
+            after = self._decode_cursor(cursor) if cursor else None
+            rows, total = self.hierarchy_repo.get_all_rows(skip=skip, limit=limit, after=after)
+            
+            responses = [self.row_to_response(row) for row in rows]
+            
+            # A full page can be continued by keyset
+            next_cursor = self._encode_cursor(rows[-1]) if rows and len(rows) == limit else None
+            
+            # Calculate pagination (offset mode only)
+            total_pages = None
+            current_page = None
+            if total is not None:
+                total_pages = (total + limit - 1) // limit if limit > 0 else 1
+                current_page = (skip // limit) + 1 if limit > 0 else 1
             
             return EmployeeHierarchyListResponse(
                 entries=responses,
                 total=total,
                 page=current_page,
                 page_size=limit,
-                total_pages=total_pages
+                total_pages=total_pages,
+                next_cursor=next_cursor
             )
             
         except HTTPException:
             raise
         except Exception as e:
-            logger.exception(f"Error getting all hierarchy entries: {str(e)}")
+            logger.exception("Error getting all hierarchy entries: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Internal server error"
@@ -120,15 +133,14 @@ class EmployeeHierarchyService(BaseService):
         1. Direct reporting entry (depth 1)
         2. Indirect reporting entries for all managers in the chain
         """
-        logger.info(f"Creating complete hierarchy for new employee: {create_data.user_id}")
+        logger.info("Creating complete hierarchy for new employee: %s", create_data.user_id)
         
         try:
             current_user_id = self.get_current_user_id(request)
             self.verify_permission(current_user_id, "hierarchy.create")
             
             # Check if user already has any hierarchy entries
-            existing_entries = self.hierarchy_repo.get_all_by_user_id(create_data.user_id)
-            if existing_entries:
+            if self.hierarchy_repo.has_entries(create_data.user_id):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"User {create_data.user_id} already has hierarchy entries"
@@ -147,21 +159,9 @@ class EmployeeHierarchyService(BaseService):
                     detail="Failed to create hierarchy entries"
                 )
             
-            # Prepare responses
-            entry_responses = []
-            for entry in entries_created:
-                response_data = {
-                    "id": entry.id,
-                    "user_id": entry.user_id,
-                    "reporting_to_id": entry.reporting_to_id,
-                    "depth": entry.depth,
-                    "updated_by": entry.updated_by,
-                    "updated_at": entry.updated_at,
-                    "employee_name": self._get_user_name(entry.user_id),
-                    "reporting_to_name": self._get_user_name(entry.reporting_to_id) if entry.reporting_to_id else None,
-                    "updated_by_name": self._get_user_name(entry.updated_by) if entry.updated_by else None
-                }
-                entry_responses.append(EmployeeHierarchyResponse(**response_data))
+            # Prepare responses (the new entries re-read with names in one query)
+            entries = self.hierarchy_repo.get_all_by_user_id(create_data.user_id, load=NAMED_RELATIONSHIPS)
+            entry_responses = [self.to_response(entry) for entry in entries]
             
             return HierarchyCreationResponse(
                 message=f"Created {len(entries_created)} hierarchy entries successfully",
@@ -176,7 +176,7 @@ class EmployeeHierarchyService(BaseService):
         except HTTPException:
             raise
         except Exception as e:
-            logger.exception(f"Error creating complete hierarchy for new employee: {str(e)}")
+            logger.exception("Error creating complete hierarchy for new employee: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Internal server error"
@@ -184,7 +184,7 @@ class EmployeeHierarchyService(BaseService):
     
     def delete_hierarchy_entries(self, user_id: int, request) -> dict:
         """Delete ALL hierarchy entries for a user."""
-        logger.warning(f"Deleting all hierarchy entries for user: {user_id}")
+        logger.warning("Deleting all hierarchy entries for user: %s", user_id)
         
         try:
             current_user_id = self.get_current_user_id(request)
@@ -202,19 +202,38 @@ class EmployeeHierarchyService(BaseService):
         except HTTPException:
             raise
         except Exception as e:
-            logger.exception(f"Error deleting hierarchy entries: {str(e)}")
+            logger.exception("Error deleting hierarchy entries: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Internal server error"
             )
     
-    def _get_user_name(self, user_id: int) -> Optional[str]:
-        """Get user name by ID from ExistingUser model."""
-        try:
-            user = self.db.query(ExistingUser).filter(ExistingUser.user_id == user_id).first()
-            if user and user.full_name:
-                return user.full_name
-            return f"User {user_id}"
-        except Exception as e:
-            logger.error(f"Error getting user name for {user_id}: {str(e)}")
-            return f"User {user_id}"
\ No newline at end of file
+    @staticmethod
+    def to_response(entry) -> EmployeeHierarchyResponse:
+        """Build the response from an entry loaded with NAMED_RELATIONSHIPS."""
+        return EmployeeHierarchyResponse(
+            id=entry.id,
+            user_id=entry.user_id,
+            reporting_to_id=entry.reporting_to_id,
+            depth=entry.depth,
+            updated_by=entry.updated_by,
+            updated_at=entry.updated_at,
+            employee_name=_user_name(_full_name(entry.employee), entry.user_id),
+            reporting_to_name=_user_name(_full_name(entry.reporting_to), entry.reporting_to_id) if entry.reporting_to_id else None,
+            updated_by_name=_user_name(_full_name(entry.updater), entry.updated_by) if entry.updated_by else None
+        )
+    
+    @staticmethod
+    def row_to_response(row) -> EmployeeHierarchyResponse:
+        """Build the response from a row of EmployeeHierarchyRepository.*_rows."""
+        return EmployeeHierarchyResponse(
+            id=row.id,
+            user_id=row.user_id,
+            reporting_to_id=row.reporting_to_id,
+            depth=row.depth,
+            updated_by=row.updated_by,
+            updated_at=row.updated_at,
+            employee_name=_user_name(row.employee_name, row.user_id),
+            reporting_to_name=_user_name(row.reporting_to_name, row.reporting_to_id) if row.reporting_to_id else None,
+            updated_by_name=_user_name(row.updated_by_name, row.updated_by) if row.updated_by else None
+        )
@@ -15,6 +15,10 @@ class Settings(BaseSettings):
         "DATABASE_URL",
         "postgresql+psycopg2://postgres:postgres@db:5432/appdb"
     )
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 3600))
     
     # --- Authentication ---
     GOOGLE_CLIENT_ID: str = os.getenv(
@@ -25,10 +29,17 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_EXPIRE_MINUTES", 15))
     REFRESH_EXPIRE_DAYS: int = int(os.getenv("REFRESH_EXPIRE_DAYS", 15))
+    SESSION_CLEANUP_INTERVAL_MINUTES: int = int(os.getenv("SESSION_CLEANUP_INTERVAL_MINUTES", 15))
+    SESSION_CLEANUP_BATCH_SIZE: int = int(os.getenv("SESSION_CLEANUP_BATCH_SIZE", 10000))
+    
+    # --- Attendance ---
+    MONTHLY_SUMMARY_REFRESH_HOURS: int = int(os.getenv("MONTHLY_SUMMARY_REFRESH_HOURS", 24))
+    MONTHLY_SUMMARY_DIRTY_CHECK_MINUTES: int = int(os.getenv("MONTHLY_SUMMARY_DIRTY_CHECK_MINUTES", 15))
     
     # --- Application ---
     FRONTEND_ORIGIN: str = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    QUERY_COUNT_WARN_THRESHOLD: int = int(os.getenv("QUERY_COUNT_WARN_THRESHOLD", 10))  # DEBUG only
     
     # --- Security ---
     SECURE_COOKIES: bool = os.getenv("SECURE_COOKIES", "False").lower() == "true"
@@ -84,8 +84,9 @@ class SecurityService:
             )
     
     @staticmethod
-    def create_refresh_token(subject: str, user_id: Optional[int] = None) -> str:
-        """Create JWT refresh token with user_id."""
+    def create_refresh_token(subject: str, user_id: Optional[int] = None,
+                             session_id: Optional[int] = None) -> str:
+        """Create JWT refresh token with user_id and session id."""
         logger.debug(f"Creating refresh token for subject: {subject}, user_id: {user_id}")
         
         try:
@@ -104,6 +105,10 @@ class SecurityService:
             if user_id is not None:
                 payload["user_id"] = user_id
             
+            # Add session id so the session can be addressed by primary key
+            if session_id is not None:
+                payload["sid"] = session_id
+            
             token = jwt.encode(
                 payload,
                 settings.JWT_SECRET,
@@ -207,6 +212,20 @@ class SecurityService:
         except (HTTPException, ValueError):
             return None
     
+    @staticmethod
+    def extract_session_id_from_token(token: str) -> Optional[int]:
+        """Extract session id (sid claim) from a refresh token."""
+        try:
+            payload = SecurityService.verify_local_token(token)
+            session_id = payload.get('sid')
+            
+            if session_id is not None:
+                return int(session_id)
+            return None
+            
+        except (HTTPException, ValueError):
+            return None
+    
     @staticmethod
     def extract_email_from_token(token: str) -> Optional[str]:
         """Extract email from a JWT token."""
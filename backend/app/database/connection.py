@@ -1,4 +1,5 @@
 import logging
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -9,15 +10,25 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 
+def _orjson_dumps(obj) -> str:
+    """Serialize JSON/JSONB column values with orjson."""
+    return orjson.dumps(obj).decode()
+
+
 # Create synchronous engine for SQLAlchemy 1.4/2.0
 engine = create_engine(
     settings.DATABASE_URL,
     poolclass=QueuePool,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
     pool_pre_ping=True,
     echo=settings.DEBUG,
-    future=True
+    future=True,
+    insertmanyvalues_page_size=1000,
+    json_serializer=_orjson_dumps,
+    json_deserializer=orjson.loads
 )
 
 # For async support (if needed)
@@ -27,6 +38,8 @@ if settings.DATABASE_URL.startswith("postgresql+asyncpg"):
         settings.DATABASE_URL.replace("postgresql+asyncpg", "postgresql+asyncpg"),
         echo=settings.DEBUG,
         pool_pre_ping=True,
+        json_serializer=_orjson_dumps,
+        json_deserializer=orjson.loads,
     )
 
 
@@ -11,7 +11,9 @@ from app.database.connection import engine
 logger = logging.getLogger(__name__)
 
 
-# Create session factory
+# Create session factory.
+# Repositories flush explicitly before reads that depend on pending writes, and
+# instances stay loaded after commit so responses don't trigger a re-SELECT.
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
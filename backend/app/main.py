@@ -375,12 +375,15 @@
 
 
 
+import asyncio
 import logging
 import time
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from sqlalchemy import create_engine, text
@@ -452,6 +455,76 @@ def sync_permissions_on_startup() -> bool:
         return False
 
 
+def purge_expired_sessions() -> int:
+    """Delete sessions expired for over a day, in throttled batches."""
+    from app.database.session import SessionLocal
+    from app.apis.auth.repositories import SessionRepository
+
+    expired_before = datetime.utcnow() - timedelta(days=1)
+    batch_size = settings.SESSION_CLEANUP_BATCH_SIZE
+    total = 0
+
+    db = SessionLocal()
+    try:
+        session_repo = SessionRepository(db)
+        while True:
+            deleted = session_repo.purge_expired_sessions(expired_before, batch_size)
+            total += deleted
+            if deleted < batch_size:
+                break
+            # Give other writers room between batches
+            time.sleep(0.1)
+    finally:
+        db.close()
+
+    return total
+
+
+async def run_session_cleanup():
+    """Periodically purge expired sessions in a worker thread."""
+    interval = settings.SESSION_CLEANUP_INTERVAL_MINUTES * 60
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            deleted = await asyncio.to_thread(purge_expired_sessions)
+            if deleted:
+                logger.info(f"🧹 Purged {deleted} expired sessions")
+        except Exception as e:
+            logger.error(f"❌ Session cleanup failed: {e}")
+
+
+def refresh_monthly_summary(only_if_dirty: bool = False) -> bool:
+    """Refresh the monthly attendance rollup view."""
+    from app.database.session import SessionLocal
+    from app.apis.employee_availability.repositories import AttendanceRepository
+
+    db = SessionLocal()
+    try:
+        return AttendanceRepository(db).refresh_monthly_summary(only_if_dirty=only_if_dirty)
+    finally:
+        db.close()
+
+
+async def run_monthly_summary_refresh():
+    """
+    Refresh the monthly summary view now and then periodically, off the
+    event loop; in between, refresh early once writes have marked months dirty.
+    """
+    interval = settings.MONTHLY_SUMMARY_REFRESH_HOURS * 3600
+    dirty_check_interval = settings.MONTHLY_SUMMARY_DIRTY_CHECK_MINUTES * 60
+    next_full_refresh = 0.0
+    while True:
+        full_refresh = time.monotonic() >= next_full_refresh
+        try:
+            if await asyncio.to_thread(refresh_monthly_summary, not full_refresh):
+                logger.info("📊 Monthly attendance summary refreshed")
+        except Exception as e:
+            logger.error(f"❌ Monthly summary refresh failed: {e}")
+        if full_refresh:
+            next_full_refresh = time.monotonic() + interval
+        await asyncio.sleep(dirty_check_interval)
+
+
 # @asynccontextmanager
 # async def lifespan(app: FastAPI):
 #     logger.info("🚀 HRMS Application Starting Up...")
@@ -479,7 +552,20 @@ async def lifespan(app: FastAPI):
     logger.info("✅ Tables ensured")
     # 4️⃣ Run permission sync AFTER tables exist
     sync_permissions_on_startup()
+    # 5️⃣ Start expired-session sweeper and monthly summary refresher.
+    # Every gunicorn worker runs its own pair: the view refresh is
+    # serialized by an advisory lock (other workers skip the tick) and the
+    # purge is idempotent batched deletes, so extra workers only add a few
+    # queries per interval. Each purge batch and each refresh is its own
+    # transaction, so a task cancelled mid-run leaves nothing half-done.
+    background_tasks = [
+        asyncio.create_task(run_session_cleanup()),
+        asyncio.create_task(run_monthly_summary_refresh()),
+    ]
     yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
     logger.info("👋 HRMS Application Shutting Down...")
 
 
@@ -493,6 +579,7 @@ app = FastAPI(
     redoc_url="/api/redoc" if settings.DEBUG else None,
     openapi_url="/api/openapi.json" if settings.DEBUG else None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
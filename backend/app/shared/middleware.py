@@ -1,10 +1,17 @@
 import logging
 import time
 import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
 from fastapi import FastAPI, Request
+from sqlalchemy import event
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
+from app.core.config import settings
+from app.database.connection import engine
+
 
 logger = logging.getLogger(__name__)
 
@@ -69,8 +76,54 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 
+# SQL statements executed in the current request (None outside count_queries)
+_request_queries: ContextVar[Optional[List[str]]] = ContextVar("request_queries", default=None)
+
+
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    """before_cursor_execute listener: record the statement for the active counter."""
+    queries = _request_queries.get()
+    if queries is not None:
+        queries.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements executed inside the block."""
+    queries: List[str] = []
+    token = _request_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _request_queries.reset(token)
+
+
+class QueryCountMiddleware(BaseHTTPMiddleware):
+    """Middleware warning about requests that run too many SQL queries (N+1 guard)."""
+    
+    def __init__(self, app, threshold: int):
+        super().__init__(app)
+        self.threshold = threshold
+    
+    async def dispatch(self, request: Request, call_next):
+        with count_queries() as queries:
+            response = await call_next(request)
+        
+        if len(queries) > self.threshold:
+            logger.warning(
+                f"High query count: {len(queries)} queries "
+                f"| {request.method} {request.url.path} "
+                f"| Request-ID: {getattr(request.state, 'request_id', None)}"
+            )
+        
+        return response
+
+
 def setup_middleware(app: FastAPI):
     """Setup all middleware for the application."""
+    if settings.DEBUG:
+        event.listen(engine, "before_cursor_execute", _record_query)
+        app.add_middleware(QueryCountMiddleware, threshold=settings.QUERY_COUNT_WARN_THRESHOLD)
     app.add_middleware(LoggingMiddleware)
     app.add_middleware(SecurityHeadersMiddleware)
     logger.info("Middleware setup complete")
\ No newline at end of file